@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark LINE reply latency: per-call ApiClient vs. the pooled AsyncMessagingApi.
+
+"before" reproduces the old LineService: a new ApiClient (and TLS connection)
+inside asyncio.to_thread for every reply. "after" uses LineService, which keeps
+one AsyncMessagingApi with keep-alive connections.
+
+Reply tokens are fake, so LINE answers 400/401 without sending anything; every
+response still counts as a full round trip.
+
+Usage:
+    python scripts/benchmark_line_reply.py
+    python scripts/benchmark_line_reply.py --requests 100 --concurrency 5
+    python scripts/benchmark_line_reply.py --local   # offline: local HTTPS mock with a self-signed cert
+"""
+
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+from linebot.v3.messaging import (
+    ApiClient,
+    Configuration,
+    MessagingApi,
+    ReplyMessageRequest,
+    TextMessage,
+)
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.line_service import LineService
+
+
+def build_request() -> ReplyMessageRequest:
+    return ReplyMessageRequest(
+        reply_token="0" * 32,
+        messages=[TextMessage(text="benchmark")]
+    )
+
+
+def reply_with_new_client(configuration: Configuration) -> None:
+    """舊版作法：每則訊息建立新的 ApiClient"""
+    with ApiClient(configuration) as api_client:
+        MessagingApi(api_client).reply_message(build_request())
+
+
+async def timed(call) -> float:
+    started = time.perf_counter()
+    try:
+        await call()
+    except Exception:
+        pass  # 400/401 is expected with a fake reply token
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(label: str, call, requests: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> float:
+        async with semaphore:
+            return await timed(call)
+
+    print(f"Running {label}...")
+    return list(await asyncio.gather(*(one() for _ in range(requests))))
+
+
+async def start_local_server() -> tuple[web.AppRunner, str]:
+    """Local HTTPS endpoint that answers like LINE does for an invalid reply token."""
+    cert_dir = tempfile.mkdtemp()
+    cert, key = os.path.join(cert_dir, "cert.pem"), os.path.join(cert_dir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ssl_context.load_cert_chain(cert, key)
+
+    async def reply(request: web.Request) -> web.Response:
+        await request.read()
+        return web.json_response({"message": "Invalid reply token"}, status=400)
+
+    app = web.Application()
+    app.router.add_post("/v2/bot/message/reply", reply)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=ssl_context)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"https://127.0.0.1:{port}"
+
+
+def summarize(label: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return (
+        f"{label:<28} {statistics.mean(timings):>9.1f} {statistics.median(timings):>9.1f} "
+        f"{p95:>9.1f} {ordered[-1]:>9.1f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark LINE reply latency")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--local", action="store_true", help="Use a local HTTPS mock instead of api.line.me")
+    args = parser.parse_args()
+
+    runner = host = None
+    if args.local:
+        runner, host = await start_local_server()
+    configuration = Configuration(
+        host=host,
+        access_token=os.environ.get("LINE_CHANNEL_ACCESS_TOKEN", "benchmark")
+    )
+    if args.local:
+        configuration.verify_ssl = False
+    print(f"Endpoint: {configuration.host or 'https://api.line.me'}")
+
+    service = LineService()
+    service.configuration = configuration
+
+    try:
+        before = await run(
+            "new ApiClient per reply",
+            lambda: asyncio.to_thread(reply_with_new_client, configuration),
+            args.requests, args.concurrency
+        )
+        after = await run(
+            "pooled AsyncMessagingApi",
+            lambda: service._api().reply_message(build_request()),
+            args.requests, args.concurrency
+        )
+    finally:
+        await service.aclose()
+        if runner:
+            await runner.cleanup()
+
+    print(f"\n{args.requests} replies, concurrency {args.concurrency} (ms)")
+    print(f"{'client':<28} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+    print(summarize("new ApiClient per reply", before))
+    print(summarize("pooled AsyncMessagingApi", after))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
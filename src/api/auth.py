@@ -1,6 +1,7 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import get_db
 from src.database.models import User
 from pydantic import BaseModel
@@ -18,14 +19,15 @@ class GitHubUserCreate(BaseModel):
 
 
 @router.post("/github-login")
-async def github_login(user_data: GitHubUserCreate, db: Session = Depends(get_db)):
+async def github_login(user_data: GitHubUserCreate, db: AsyncSession = Depends(get_db)):
     """
     GitHub OAuth callback handler.
     Creates or updates user based on GitHub profile.
     """
     try:
         # Check if user exists
-        user = db.query(User).filter(User.github_id == user_data.github_id).first()
+        result = await db.execute(select(User).where(User.github_id == user_data.github_id))
+        user = result.scalars().first()
 
         if user:
             # Update existing user
@@ -44,8 +46,8 @@ async def github_login(user_data: GitHubUserCreate, db: Session = Depends(get_db
             db.add(user)
             logger.info(f"Created new user: {user.username}")
 
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
         return {
             "id": user.id,
@@ -57,7 +59,7 @@ async def github_login(user_data: GitHubUserCreate, db: Session = Depends(get_db
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"GitHub login error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -66,12 +68,12 @@ async def github_login(user_data: GitHubUserCreate, db: Session = Depends(get_db
 
 
 @router.get("/me")
-async def get_current_user(user_id: int, db: Session = Depends(get_db)):
+async def get_current_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get current user info.
     In production, user_id would come from JWT token.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 
+from src.services.line_event_queue import line_event_queue
+from src.services.notion_service import notion_service
+
 router = APIRouter(tags=["health"])
 
 
@@ -13,3 +16,15 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/health/notion")
+async def notion_request_stats():
+    """Notion request scheduler queue depth and retry counters."""
+    return notion_service.requests.stats()
+
+
+@router.get("/health/line")
+async def line_webhook_stats():
+    """LINE webhook queue depth and latency histograms."""
+    return line_event_queue.stats()
@@ -1,24 +1,26 @@
+import asyncio
 import logging
 import json
+import time
 import hashlib
 import hmac
 import base64
-from pathlib import Path
-from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException
 
+from src.services.audit_log import audit_log
 from src.services.line_service import line_service
 from src.services.task_processor import task_processor
+from src.services.job_queue import job_queue
+from src.services.line_event_queue import line_event_queue
 from src.config import settings
 from src.constants import (
     LINE_MESSAGE_PREVIEW_LENGTH,
     LINE_LOG_MESSAGE_LENGTH,
     LINE_FILE_LOG_MESSAGE_LENGTH,
-    USER_IDS_LOG_FILENAME,
+    TASK_PRIORITY_ADMIN,
+    TASK_PRIORITY_USER,
 )
 
-# 專案根目錄（從 src/api/ 往上兩層）
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["line"])
 
@@ -33,14 +35,22 @@ AUTHORIZED_USERS = {
 
 
 async def process_message_background(user_input: str, user_id: str, user_name: str):
-    """Background task to process LINE message."""
-    try:
-        await task_processor.process_task(
-            user_input=user_input,
-            source="line"
-        )
-    except Exception as e:
-        logger.error(f"Background task failed: {e}", exc_info=True)
+    """Background task to process LINE message (failures propagate so job_queue records them)."""
+    await task_processor.process_task(
+        user_input=user_input,
+        source="line",
+        user_id=user_id
+    )
+
+
+LINE_MESSAGE_JOB = "line_message"
+
+
+async def _run_line_message_job(payload: dict) -> None:
+    await process_message_background(**payload)
+
+
+job_queue.register(LINE_MESSAGE_JOB, _run_line_message_job)
 
 
 async def notify_admin(user_name: str, user_input: str):
@@ -56,8 +66,9 @@ async def notify_admin(user_name: str, user_input: str):
 
 
 @router.post("/webhook/line")
-async def line_webhook(request: Request, background_tasks: BackgroundTasks):
-    """LINE Webhook endpoint with user authorization."""
+async def line_webhook(request: Request):
+    """LINE Webhook endpoint: verify the signature, persist the task, then ack; replies are sent in the background."""
+    received_at = time.perf_counter()
 
     signature = request.headers.get("X-Line-Signature", "")
     if not signature:
@@ -87,47 +98,80 @@ async def line_webhook(request: Request, background_tasks: BackgroundTasks):
         logger.error(f"Signature verification failed: {e}")
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    events = body_json.get("events", [])
-
-    for event in events:
-        if event.get("type") != "message":
+    # 任務在回應前寫入持久化佇列（一筆 INSERT），回覆與通知管理員交給背景 worker
+    for event in body_json.get("events", []):
+        message = _parse_text_message(event)
+        if message is None:
             continue
-        if event.get("message", {}).get("type") != "text":
-            continue
-
-        reply_token = event.get("replyToken")
-        user_id = event.get("source", {}).get("userId")
-        user_input = event.get("message", {}).get("text", "")
-
-        # Log all incoming messages
-        log_file = PROJECT_ROOT / USER_IDS_LOG_FILENAME
-        with open(log_file, "a") as f:
-            f.write(f"User ID: {user_id}, Message: {user_input[:LINE_FILE_LOG_MESSAGE_LENGTH]}\n")
+        reply_token, user_id, user_input = message
 
+        # Log all incoming messages (buffered, written by a background flusher)
+        audit_log.write(user_id=user_id, message=user_input[:LINE_FILE_LOG_MESSAGE_LENGTH])
         logger.info(f"Received message from {user_id}: {user_input[:LINE_LOG_MESSAGE_LENGTH]}...")
 
         if not user_input:
             continue
 
-        # 檢查使用者是否授權
-        if user_id not in AUTHORIZED_USERS:
-            logger.warning(f"Unauthorized user: {user_id}")
+        if user_id in AUTHORIZED_USERS:
             try:
-                await line_service.reply_message(
-                    reply_token=reply_token,
-                    message="抱歉，你目前沒有使用權限。請聯繫管理員。"
+                await job_queue.enqueue(
+                    LINE_MESSAGE_JOB,
+                    {
+                        "user_input": user_input,
+                        "user_id": user_id,
+                        "user_name": AUTHORIZED_USERS[user_id]
+                    },
+                    owner=user_id,
+                    priority=TASK_PRIORITY_ADMIN if user_id == ADMIN_USER_ID else TASK_PRIORITY_USER,
+                    # process_task 會推播錯誤、建立 Notion 頁面並部署，重試會重複這些動作
+                    max_attempts=1
                 )
             except Exception as e:
-                logger.error(f"Failed to send unauthorized reply: {e}")
-            continue
+                logger.error(f"Failed to enqueue LINE message: {e}", exc_info=True)
+                raise HTTPException(status_code=500, detail="Failed to queue message")
+
+        line_event_queue.submit(event, received_at)
+
+    line_event_queue.observe_webhook(received_at)
+    return {"status": "ok"}
+
 
-        # 取得使用者名稱
-        user_name = AUTHORIZED_USERS[user_id]
+def _parse_text_message(event: dict):
+    """文字訊息事件回傳 (reply_token, user_id, text)，其他事件回傳 None"""
+    if event.get("type") != "message":
+        return None
+    if event.get("message", {}).get("type") != "text":
+        return None
+    return (
+        event.get("replyToken"),
+        event.get("source", {}).get("userId"),
+        event.get("message", {}).get("text", "")
+    )
+
+
+async def handle_line_event(event: dict) -> None:
+    """
+    處理單一 LINE 文字訊息事件：回覆確認與通知管理員並行送出
+    （任務已由 webhook 寫入持久化佇列）
+    """
+    reply_token, user_id, user_input = _parse_text_message(event)
+
+    # 檢查使用者是否授權
+    if user_id not in AUTHORIZED_USERS:
+        logger.warning(f"Unauthorized user: {user_id}")
+        try:
+            await line_service.reply_message(
+                reply_token=reply_token,
+                message="抱歉，你目前沒有使用權限。請聯繫管理員。"
+            )
+        except Exception as e:
+            logger.error(f"Failed to send unauthorized reply: {e}")
+        return
 
-        # 如果不是管理員，通知管理員有人提出請求
-        if user_id != ADMIN_USER_ID:
-            await notify_admin(user_name, user_input)
+    # 取得使用者名稱
+    user_name = AUTHORIZED_USERS[user_id]
 
+    async def reply() -> None:
         # 授權使用者 - 回覆確認訊息
         try:
             await line_service.reply_message(
@@ -137,11 +181,11 @@ async def line_webhook(request: Request, background_tasks: BackgroundTasks):
         except Exception as e:
             logger.error(f"Failed to send reply: {e}")
 
-        background_tasks.add_task(
-            process_message_background,
-            user_input=user_input,
-            user_id=user_id,
-            user_name=user_name
-        )
+    # 如果不是管理員，同時通知管理員有人提出請求
+    if user_id != ADMIN_USER_ID:
+        await asyncio.gather(reply(), notify_admin(user_name, user_input))
+    else:
+        await reply()
 
-    return {"status": "ok"}
+
+line_event_queue.register(handle_line_event)
@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response
+
+# 分頁游標透過回應標頭傳回，保持回應 body 仍為 list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """將 (created_at, id) 編碼為不透明的游標字串"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """解碼游標，格式錯誤時回傳 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def validate_cursor_params(after: Optional[str], before: Optional[str]) -> None:
+    """after 與 before 只能擇一"""
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either 'after' or 'before', not both")
+
+
+def paginate_rows(
+    rows: list[Any],
+    limit: int,
+    after: Optional[str],
+    before: Optional[str]
+) -> tuple[list[Any], Optional[str], Optional[str]]:
+    """
+    從多取一筆的查詢結果切出單頁，回傳 (items, next_cursor, prev_cursor)。
+    rows 需具備 created_at 與 id；使用 before 時 rows 為反向排序。
+    """
+    has_more = len(rows) > limit
+    items = list(rows[:limit])
+    next_cursor = prev_cursor = None
+
+    if before:
+        items.reverse()
+        if items:
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+            if has_more:
+                prev_cursor = encode_cursor(items[0].created_at, items[0].id)
+    elif items:
+        if has_more:
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+        if after:
+            prev_cursor = encode_cursor(items[0].created_at, items[0].id)
+
+    return items, next_cursor, prev_cursor
+
+
+def set_cursor_headers(
+    response: Response,
+    next_cursor: Optional[str],
+    prev_cursor: Optional[str]
+) -> None:
+    """將上一頁/下一頁游標寫入回應標頭"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
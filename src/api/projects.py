@@ -1,18 +1,65 @@
+import asyncio
 import logging
 import json
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from src.database import get_db
-from src.database.models import Project, TaskLog, User, TaskStatus
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from src.database import get_db, AsyncSessionLocal
+from src.database.models import JobStatus, Project, TaskLog, User, TaskStatus
+from src.api.pagination import (
+    decode_cursor,
+    paginate_rows,
+    set_cursor_headers,
+    validate_cursor_params,
+)
 from src.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
-from src.services.web_task_processor import WebTaskProcessor
+from src.services.event_bus import RESYNC_EVENT_TYPE, event_bus
+from src.services.task_scheduler import task_scheduler
+from src.services.web_task_processor import WebTaskProcessor, enqueue_project, project_job_position
+from src.constants import (
+    SSE_KEEPALIVE_INTERVAL_SECONDS,
+    PROJECT_PAGE_DEFAULT_LIMIT,
+    PAGE_MAX_LIMIT,
+    TASK_LOG_PAGE_DEFAULT_LIMIT,
+    TASK_LOG_PAGE_MAX_LIMIT,
+    TASK_LOG_STREAM_PAGE_SIZE,
+)
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = {
+    TaskStatus.COMPLETED.value,
+    TaskStatus.FAILED.value,
+    TaskStatus.CANCELLED.value,
+}
+
+
+def _sse(data: dict) -> str:
+    """格式化單一 SSE 事件"""
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def _get_owned_project(
+    db: AsyncSession,
+    project_id: int,
+    user_id: int,
+    with_relations: bool = True
+) -> Optional[Project]:
+    """取得使用者擁有的專案；with_relations 時預先載入 ProjectResponse 需要的 owner/logs"""
+    query = select(Project).where(Project.id == project_id, Project.owner_id == user_id)
+    if with_relations:
+        query = query.options(
+            selectinload(Project.owner),
+            selectinload(Project.logs)
+        ).execution_options(populate_existing=True)
+    result = await db.execute(query)
+    return result.scalars().first()
+
 
 # Simple auth dependency (replace with JWT in production)
 async def get_current_user_id(user_id: int = 1) -> int:
@@ -23,11 +70,10 @@ async def get_current_user_id(user_id: int = 1) -> int:
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project: ProjectCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
-    """建立新專案並在背景執行任務"""
+    """建立新專案並排入持久化任務佇列"""
     try:
         # Create project
         new_project = Project(
@@ -38,53 +84,75 @@ async def create_project(
             status=TaskStatus.PENDING
         )
         db.add(new_project)
-        db.commit()
-        db.refresh(new_project)
+        await db.commit()
+        new_project = await _get_owned_project(db, new_project.id, user_id)
 
-        # Start task in background
-        processor = WebTaskProcessor(db)
-        background_tasks.add_task(processor.process_task, new_project.id)
+        # Enqueue durable job (survives restarts)
+        await enqueue_project(new_project.id, user_id)
 
         logger.info(f"Created project {new_project.id}: {new_project.name}")
         return new_project
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to create project: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("", response_model=List[ProjectResponse])
 async def list_projects(
-    skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(PROJECT_PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
-    """取得使用者的所有專案"""
-    projects = (
-        db.query(Project)
-        .filter(Project.owner_id == user_id)
-        .order_by(Project.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    """
+    取得使用者的專案（新到舊，keyset 分頁）
+    下一頁/上一頁游標由 X-Next-Cursor / X-Prev-Cursor 標頭傳回。
+    """
+    validate_cursor_params(after, before)
+
+    query = (
+        select(Project)
+        .where(Project.owner_id == user_id)
+        .options(selectinload(Project.owner), selectinload(Project.logs))
+        .limit(limit + 1)
     )
+
+    if before:
+        # 往前翻頁：取比游標更新的資料，反向排序後再轉回新到舊
+        created_at, row_id = decode_cursor(before)
+        query = query.where(or_(
+            Project.created_at > created_at,
+            and_(Project.created_at == created_at, Project.id > row_id)
+        )).order_by(Project.created_at.asc(), Project.id.asc())
+    else:
+        if after:
+            created_at, row_id = decode_cursor(after)
+            query = query.where(or_(
+                Project.created_at < created_at,
+                and_(Project.created_at == created_at, Project.id < row_id)
+            ))
+        query = query.order_by(Project.created_at.desc(), Project.id.desc())
+
+    result = await db.execute(query)
+    projects, next_cursor, prev_cursor = paginate_rows(
+        result.scalars().all(), limit, after, before
+    )
+    set_cursor_headers(response, next_cursor, prev_cursor)
     return projects
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     """取得特定專案詳情"""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == user_id)
-        .first()
-    )
+    project = await _get_owned_project(db, project_id, user_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
@@ -94,15 +162,11 @@ async def get_project(
 async def update_project(
     project_id: int,
     updates: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     """更新專案資訊"""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == user_id)
-        .first()
-    )
+    project = await _get_owned_project(db, project_id, user_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -110,8 +174,8 @@ async def update_project(
     for field, value in updates.model_dump(exclude_unset=True).items():
         setattr(project, field, value)
 
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    project = await _get_owned_project(db, project_id, user_id)
     logger.info(f"Updated project {project_id}")
     return project
 
@@ -119,124 +183,239 @@ async def update_project(
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     """刪除專案"""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == user_id)
-        .first()
-    )
+    project = await _get_owned_project(db, project_id, user_id, with_relations=False)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
     logger.info(f"Deleted project {project_id}")
     return None
 
 
+def _log_to_dict(log: TaskLog) -> dict:
+    return {
+        "id": log.id,
+        "message": log.message,
+        "log_type": log.log_type,
+        "created_at": log.created_at.isoformat()
+    }
+
+
 @router.get("/{project_id}/logs")
 async def get_project_logs(
     project_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=TASK_LOG_PAGE_MAX_LIMIT),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
-    """取得專案的執行日誌"""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == user_id)
-        .first()
-    )
+    """
+    取得專案的執行日誌（依寫入順序）
+    指定 limit/after/before 時回傳單頁並以標頭傳回游標；
+    否則以分頁查詢串流輸出完整日誌，不會一次載入所有資料。
+    """
+    validate_cursor_params(after, before)
+
+    project = await _get_owned_project(db, project_id, user_id, with_relations=False)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    logs = (
-        db.query(TaskLog)
-        .filter(TaskLog.project_id == project_id)
-        .order_by(TaskLog.created_at.asc())
-        .all()
+    if limit is None and not after and not before:
+        return StreamingResponse(
+            _stream_all_logs(project_id),
+            media_type="application/json"
+        )
+
+    limit = limit or TASK_LOG_PAGE_DEFAULT_LIMIT
+    query = (
+        select(TaskLog)
+        .where(TaskLog.project_id == project_id)
+        .limit(limit + 1)
     )
+    if before:
+        _, row_id = decode_cursor(before)
+        query = query.where(TaskLog.id < row_id).order_by(TaskLog.id.desc())
+    else:
+        if after:
+            _, row_id = decode_cursor(after)
+            query = query.where(TaskLog.id > row_id)
+        query = query.order_by(TaskLog.id.asc())
+
+    result = await db.execute(query)
+    logs, next_cursor, prev_cursor = paginate_rows(
+        result.scalars().all(), limit, after, before
+    )
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return [_log_to_dict(log) for log in logs]
+
+
+async def _stream_all_logs(project_id: int):
+    """以 keyset 分頁逐頁讀取日誌並串流輸出 JSON 陣列"""
+    last_id = 0
+    first = True
+    yield "["
+    # 請求的 db session 在串流開始前就已關閉，這裡使用獨立的 session
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(TaskLog)
+                .where(TaskLog.project_id == project_id, TaskLog.id > last_id)
+                .order_by(TaskLog.id.asc())
+                .limit(TASK_LOG_STREAM_PAGE_SIZE)
+            )
+            page = result.scalars().all()
+            if not page:
+                break
+
+            chunk = ",".join(json.dumps(_log_to_dict(log)) for log in page)
+            yield chunk if first else "," + chunk
+            first = False
+            last_id = page[-1].id
+            db.expunge_all()
+
+            if len(page) < TASK_LOG_STREAM_PAGE_SIZE:
+                break
+    yield "]"
+
+
+@router.get("/{project_id}/queue")
+async def get_project_queue_position(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    取得專案的狀態與排隊位置：已交給本程序排程器時回報排程器中的位置，
+    仍在持久化佇列（task_jobs）等待領取時 state 為 "pending"，回報佇列中的位置
+    """
+    project = await _get_owned_project(db, project_id, user_id, with_relations=False)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
 
-    return [
-        {
-            "id": log.id,
-            "message": log.message,
-            "log_type": log.log_type,
-            "created_at": log.created_at.isoformat()
+    state = position = None
+    job = task_scheduler.find(WebTaskProcessor.scheduler_key(project_id))
+    if job:
+        state, position = job.state, task_scheduler.position(job)
+    else:
+        durable = await project_job_position(project_id)
+        if durable:
+            job_status, position = durable
+            state = "pending" if job_status == JobStatus.QUEUED else "running"
+
+    return {
+        "project_id": project_id,
+        "state": state,
+        "position": position,
+        "scheduler": task_scheduler.stats()
+    }
+
+
+async def _load_progress(project_id: int, after_log_id: int) -> Optional[tuple[list[dict], dict]]:
+    """
+    讀取 after_log_id 之後的日誌與目前狀態（SSE 補送與重新同步用）；專案不存在時回傳 None。
+    請求的 db session 在回應開始串流前就已關閉，這裡使用獨立的 session
+    """
+    async with AsyncSessionLocal() as stream_db:
+        current = await stream_db.get(Project, project_id)
+        if current is None:
+            return None
+        result = await stream_db.execute(
+            select(TaskLog)
+            .where(TaskLog.project_id == project_id, TaskLog.id > after_log_id)
+            .order_by(TaskLog.id.asc())
+        )
+        backlog = [
+            {
+                "type": "log",
+                "log_id": log.id,
+                "message": log.message,
+                "log_type": log.log_type,
+                "timestamp": log.created_at.isoformat()
+            }
+            for log in result.scalars()
+        ]
+        status_event = {
+            "type": "status",
+            "status": current.status.value,
+            "updated_at": current.updated_at.isoformat(),
+            "result_summary": current.result_summary,
+            "error_message": current.error_message
         }
-        for log in logs
-    ]
+    return backlog, status_event
 
 
 @router.get("/{project_id}/stream")
 async def stream_project_progress(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     """SSE 串流專案進度"""
-    project = (
-        db.query(Project)
-        .filter(Project.id == project_id, Project.owner_id == user_id)
-        .first()
-    )
+    project = await _get_owned_project(db, project_id, user_id, with_relations=False)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     async def event_generator():
         """Generate SSE events"""
-        last_log_id = 0
-        import asyncio
-
-        while True:
-            # Refresh project status
-            db.refresh(project)
-
-            # Get new logs
-            new_logs = (
-                db.query(TaskLog)
-                .filter(
-                    TaskLog.project_id == project_id,
-                    TaskLog.id > last_log_id
-                )
-                .order_by(TaskLog.created_at.asc())
-                .all()
-            )
-
-            # Send new logs
-            for log in new_logs:
-                data = {
-                    "type": "log",
-                    "log_id": log.id,
-                    "message": log.message,
-                    "log_type": log.log_type,
-                    "timestamp": log.created_at.isoformat()
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_log_id = log.id
-
-            # Send status update
-            status_data = {
-                "type": "status",
-                "status": project.status.value,
-                "updated_at": project.updated_at.isoformat()
-            }
-            yield f"data: {json.dumps(status_data)}\n\n"
-
-            # Check if completed
-            if project.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
-                final_data = {
-                    "type": "complete",
-                    "status": project.status.value,
-                    "result_summary": project.result_summary,
-                    "error_message": project.error_message
-                }
-                yield f"data: {json.dumps(final_data)}\n\n"
-                break
-
-            await asyncio.sleep(1)  # Poll every second
+        # 先訂閱再補送歷史資料，避免兩者之間寫入的事件遺失
+        async with event_bus.subscribe(project_id) as queue:
+            last_log_id = 0
+            resync = True
+            status_event = None
+
+            # Push events as they are published; idle streams cost no queries
+            while True:
+                if resync:
+                    # Catch up on logs written before the subscription (or lost on overflow)
+                    resync = False
+                    progress = await _load_progress(project_id, last_log_id)
+                    if progress is None:
+                        # 專案在權限檢查後被刪除
+                        yield _sse({"type": "error", "message": "Project not found"})
+                        return
+                    backlog, status_event = progress
+                    for event in backlog:
+                        yield _sse(event)
+                        last_log_id = event["log_id"]
+
+                if status_event:
+                    yield _sse({
+                        "type": "status",
+                        "status": status_event["status"],
+                        "updated_at": status_event["updated_at"]
+                    })
+                    if status_event["status"] in TERMINAL_STATUSES:
+                        yield _sse({
+                            "type": "complete",
+                            "status": status_event["status"],
+                            "result_summary": status_event["result_summary"],
+                            "error_message": status_event["error_message"]
+                        })
+                        break
+                    status_event = None
+
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=SSE_KEEPALIVE_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event["type"] == RESYNC_EVENT_TYPE:
+                    resync = True
+                elif event["type"] == "status":
+                    status_event = event
+                elif event["type"] == "log" and event["log_id"] > last_log_id:
+                    yield _sse(event)
+                    last_log_id = event["log_id"]
 
     return StreamingResponse(
         event_generator(),
@@ -0,0 +1,106 @@
+import logging
+from typing import List, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.pagination import (
+    decode_cursor,
+    paginate_rows,
+    set_cursor_headers,
+    validate_cursor_params,
+)
+from src.api.projects import get_current_user_id
+from src.constants import PAGE_MAX_LIMIT, PROJECT_PAGE_DEFAULT_LIMIT
+from src.database import get_db
+from src.database.models import TaskFolder, TaskStatus
+from src.schemas.task_folder import TaskFolderResponse
+from src.services.claude_code_service import claude_code_service
+from src.services.task_archive import ARCHIVE_FORMATS, stream_archive
+
+router = APIRouter(prefix="/api/tasks", tags=["Tasks"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("", response_model=List[TaskFolderResponse])
+async def list_task_folders(
+    response: Response,
+    task_status: Optional[TaskStatus] = Query(None, alias="status"),
+    q: Optional[str] = Query(None, description="搜尋資料夾名稱或標題"),
+    prompt_hash: Optional[str] = Query(None, description="任務提示詞的 SHA-256"),
+    limit: int = Query(PROJECT_PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    列出任務資料夾（新到舊，keyset 分頁），資料來自 task_folders 登記表，不走訪目錄
+    下一頁/上一頁游標由 X-Next-Cursor / X-Prev-Cursor 標頭傳回。
+    """
+    validate_cursor_params(after, before)
+
+    query = select(TaskFolder).limit(limit + 1)
+    if task_status:
+        query = query.where(TaskFolder.status == task_status)
+    if q:
+        pattern = f"%{q}%"
+        query = query.where(or_(TaskFolder.folder_name.ilike(pattern), TaskFolder.title.ilike(pattern)))
+    if prompt_hash:
+        query = query.where(TaskFolder.prompt_hash == prompt_hash)
+
+    if before:
+        created_at, row_id = decode_cursor(before)
+        query = query.where(or_(
+            TaskFolder.created_at > created_at,
+            and_(TaskFolder.created_at == created_at, TaskFolder.id > row_id)
+        )).order_by(TaskFolder.created_at.asc(), TaskFolder.id.asc())
+    else:
+        if after:
+            created_at, row_id = decode_cursor(after)
+            query = query.where(or_(
+                TaskFolder.created_at < created_at,
+                and_(TaskFolder.created_at == created_at, TaskFolder.id < row_id)
+            ))
+        query = query.order_by(TaskFolder.created_at.desc(), TaskFolder.id.desc())
+
+    result = await db.execute(query)
+    folders, next_cursor, prev_cursor = paginate_rows(result.scalars().all(), limit, after, before)
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return folders
+
+
+@router.get("/{folder_name}/archive")
+async def download_task_archive(
+    folder_name: str,
+    archive_format: str = Query("zip", alias="format", description=f"壓縮格式：{', '.join(ARCHIVE_FORMATS)}"),
+    include: Optional[List[str]] = Query(None, description="只打包符合的檔案（glob，可重複）"),
+    exclude: Optional[List[str]] = Query(None, description="排除符合的檔案或目錄（glob，可重複）"),
+    include_hidden: bool = Query(False, description="包含以 . 開頭的檔案與目錄（預設略過）"),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    以串流方式下載整個任務資料夾（tasks/<folder_name>）
+    例：/api/tasks/2025-01-01_space-cat-cafe-v3/archive?format=tar.gz&exclude=node_modules
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支援的壓縮格式: {archive_format}（可用: {', '.join(ARCHIVE_FORMATS)}）"
+        )
+
+    tasks_dir = claude_code_service.tasks_dir
+    folder = tasks_dir / folder_name
+    if folder_name in (".", "..") or "/" in folder_name or folder.parent != tasks_dir or not folder.is_dir():
+        raise HTTPException(status_code=404, detail="Task folder not found")
+
+    media_type, extension = ARCHIVE_FORMATS[archive_format]
+    logger.info(f"Streaming {archive_format} archive of task folder {folder_name}")
+    return StreamingResponse(
+        stream_archive(folder, archive_format, include=include, exclude=exclude, include_hidden=include_hidden),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(folder_name + extension)}"}
+    )
@@ -1,21 +1,37 @@
+import asyncio
+import importlib.util
 import logging
-import os
-import shutil
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from fastapi.responses import FileResponse
+from urllib.parse import quote
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from src.constants import UPLOAD_CHUNK_SIZE, UPLOAD_COMPRESS_MIN_SIZE
+from src.services.upload_store import (
+    ByteBudget,
+    UploadBudgetExceededError,
+    UploadStore,
+    UploadTooLargeError,
+)
 
 router = APIRouter(prefix="/api/uploads", tags=["Uploads"])
 logger = logging.getLogger(__name__)
 
 # Upload directory
 UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+upload_store = UploadStore(UPLOAD_DIR)
 
 # Max file size: 10MB
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Max total size of one upload request: 50MB
+MAX_REQUEST_SIZE = 50 * 1024 * 1024
+
+# Files ingested concurrently per request
+UPLOAD_CONCURRENCY = 4
+
 # Allowed extensions
 ALLOWED_EXTENSIONS = {
     ".txt", ".md", ".py", ".js", ".ts", ".jsx", ".tsx",
@@ -36,86 +52,253 @@ def validate_file(file: UploadFile) -> None:
         )
 
 
+async def _ingest_file(file: UploadFile, budget: ByteBudget, semaphore: asyncio.Semaphore) -> dict:
+    """上傳單一檔案，回傳成功結果或錯誤（不拋出，讓其他檔案繼續）"""
+    async with semaphore:
+        try:
+            # Validate
+            validate_file(file)
+
+            # Stream to storage (file size and request budget are enforced while reading)
+            stored = await upload_store.save(file, max_size=MAX_FILE_SIZE, budget=budget)
+
+            logger.info(
+                f"Uploaded file: {stored.filename} ({stored.size} bytes, sha256 {stored.sha256[:12]}"
+                f"{', deduplicated' if stored.deduplicated else ''})"
+            )
+            return {
+                "filename": stored.filename,
+                "path": str(stored.path),
+                "size": stored.size,
+                "sha256": stored.sha256,
+                "deduplicated": stored.deduplicated
+            }
+
+        except UploadBudgetExceededError:
+            return _upload_error(file, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "超過單次上傳總量限制 (50MB)")
+        except UploadTooLargeError:
+            return _upload_error(file, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"檔案 {file.filename} 超過大小限制 (10MB)")
+        except HTTPException as e:
+            return _upload_error(file, e.status_code, e.detail)
+        except ValueError:
+            return _upload_error(file, status.HTTP_400_BAD_REQUEST, f"無效的檔案名稱: {file.filename}")
+        except Exception as e:
+            logger.error(f"Failed to upload {file.filename}: {str(e)}")
+            return _upload_error(file, status.HTTP_500_INTERNAL_SERVER_ERROR, f"上傳失敗: {file.filename}")
+
+
+def _upload_error(file: UploadFile, status_code: int, detail: str) -> dict:
+    return {"filename": file.filename, "status_code": status_code, "error": detail}
+
+
 @router.post("/files")
 async def upload_files(files: List[UploadFile] = File(...)):
     """
-    上傳多個檔案
-    Returns: [{"filename": "xxx", "path": "uploads/xxx", "size": 1234}]
+    上傳多個檔案（並行串流寫入，相同內容只存一份）
+    個別檔案失敗不影響其他檔案：成功的列在 files，失敗的列在 errors。
+    Returns: {"success": bool, "files": [{"filename", "path", "size", "sha256", "deduplicated"}],
+              "errors": [{"filename", "status_code", "error"}], "total": int}
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
-    uploaded_files = []
+    budget = ByteBudget(MAX_REQUEST_SIZE)
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    results = await asyncio.gather(*(_ingest_file(file, budget, semaphore) for file in files))
 
-    for file in files:
-        try:
-            # Validate
-            validate_file(file)
+    uploaded_files = [result for result in results if "error" not in result]
+    errors = [result for result in results if "error" in result]
 
-            # Read content
-            content = await file.read()
+    # 全部失敗時維持原本的錯誤回應
+    if not uploaded_files:
+        raise HTTPException(status_code=errors[0]["status_code"], detail=errors[0]["error"])
 
-            # Check size
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"檔案 {file.filename} 超過大小限制 (10MB)"
-                )
+    return {
+        "success": not errors,
+        "files": uploaded_files,
+        "errors": errors,
+        "total": len(uploaded_files)
+    }
 
-            # Save file
-            file_path = UPLOAD_DIR / file.filename
-            with open(file_path, "wb") as f:
-                f.write(content)
 
-            uploaded_files.append({
-                "filename": file.filename,
-                "path": str(file_path),
-                "size": len(content)
-            })
+# 可用的壓縮格式（依偏好排序）；brotli 為選用套件
+SUPPORTED_ENCODINGS = ["br", "gzip"] if importlib.util.find_spec("brotli") else ["gzip"]
 
-            logger.info(f"Uploaded file: {file.filename} ({len(content)} bytes)")
 
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Failed to upload {file.filename}: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"上傳失敗: {file.filename}"
-            )
+def _etag_matches(header: str, etags: set[str]) -> bool:
+    """If-None-Match 比對（weak comparison，支援多個值與 *）"""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.removeprefix("W/") in etags:
+            return True
+    return False
 
-    return {
-        "success": True,
-        "files": uploaded_files,
-        "total": len(uploaded_files)
-    }
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    解析單一 bytes range，回傳 (start, end)（end 含在內）。
+    格式不正確或多段 range 時回傳 None（改傳完整檔案）；範圍無法滿足時拋出 ValueError。
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep or not (start_text or end_text):
+        return None
+    if any(part and not part.isdigit() for part in (start_text, end_text)):
+        return None
+
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if end_text and end < start:
+            return None
+        if start >= size:
+            raise ValueError("range not satisfiable")
+    else:
+        # bytes=-N：最後 N bytes
+        if int(end_text) == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        start, end = max(size - int(end_text), 0), size - 1
+    return start, min(end, size - 1)
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """依 Accept-Encoding（含 q 值）選擇壓縮格式"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+async def _iter_range(path: Path, start: int, length: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        await asyncio.to_thread(f.seek, start)
+        while length > 0:
+            chunk = await asyncio.to_thread(f.read, min(UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
 
 
 @router.get("/files/{filename}")
-async def download_file(filename: str):
-    """下載已上傳的檔案"""
-    file_path = UPLOAD_DIR / filename
+async def download_file(filename: str, request: Request):
+    """
+    下載已上傳的檔案
+    ETag 為內容的 SHA-256，支援 If-None-Match / If-Modified-Since（304）、
+    單段 Range（206，搭配 If-Range），以及文字檔的 gzip/br 壓縮傳輸。
+    """
+    file_path = upload_store.find(filename)
 
-    if not file_path.exists():
+    if file_path is None:
         raise HTTPException(status_code=404, detail="File not found")
 
+    stat = file_path.stat()
+    sha256 = await upload_store.content_hash(file_path)
+    etag = f'"{sha256}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    compressible = (
+        Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
+        and stat.st_size >= UPLOAD_COMPRESS_MIN_SIZE
+    )
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", "")) if compressible else None
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+    }
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+
+    # Conditional GET
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        variant_etags = {etag} | {f'"{sha256}-{enc}"' for enc in SUPPORTED_ENCODINGS}
+        not_modified = _etag_matches(if_none_match, variant_etags)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, stat.st_mtime)
+    if not_modified:
+        if encoding:
+            headers["ETag"] = f'"{sha256}-{encoding}"'
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Range（If-Range 不符時改傳完整檔案）
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range in (etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"}
+            )
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                _iter_range(file_path, start, end - start + 1),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="application/octet-stream",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                    "Content-Length": str(end - start + 1),
+                    "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+                }
+            )
+
+    if encoding:
+        variant_path = await upload_store.compressed_variant(file_path, sha256, encoding)
+        headers["ETag"] = f'"{sha256}-{encoding}"'
+        headers["Content-Encoding"] = encoding
+        return FileResponse(
+            path=variant_path,
+            filename=filename,
+            media_type="application/octet-stream",
+            headers=headers
+        )
+
     return FileResponse(
         path=file_path,
         filename=filename,
-        media_type="application/octet-stream"
+        media_type="application/octet-stream",
+        headers=headers
     )
 
 
 @router.delete("/files/{filename}")
 async def delete_file(filename: str):
     """刪除已上傳的檔案"""
-    file_path = UPLOAD_DIR / filename
+    file_path = upload_store.find(filename)
 
-    if not file_path.exists():
+    if file_path is None:
         raise HTTPException(status_code=404, detail="File not found")
 
     try:
-        file_path.unlink()
+        await upload_store.delete(filename)
         logger.info(f"Deleted file: {filename}")
         return {"success": True, "message": f"Deleted {filename}"}
     except Exception as e:
@@ -13,10 +13,30 @@ class Settings(BaseSettings):
         default="",
         description="LINE Channel Access Token"
     )
+    line_max_connections: int = Field(
+        default=10,
+        description="Maximum concurrent HTTP connections to the LINE Messaging API"
+    )
     joey_line_user_id: str = Field(
         default="",
         description="Joey LINE User ID for push notifications"
     )
+    audit_log_format: str = Field(
+        default="text",
+        description="Incoming LINE message audit log format: text (user_ids.log) or jsonl (user_ids.jsonl)"
+    )
+    audit_log_max_bytes: int = Field(
+        default=10 * 1024 * 1024,
+        description="Rotate the audit log when it reaches this size"
+    )
+    audit_log_rotate_hours: float = Field(
+        default=24,
+        description="Rotate the audit log after this many hours"
+    )
+    audit_log_backup_count: int = Field(
+        default=14,
+        description="Number of compressed audit log segments to keep"
+    )
 
     # Notion (optional for web-only mode)
     notion_api_key: str = Field(
@@ -40,6 +60,44 @@ class Settings(BaseSettings):
         description="Notion Evolution Database ID for tracking agent self-evolution"
     )
 
+    notion_memory_cache_ttl_seconds: int = Field(
+        default=300,
+        description="How long cached Notion memories are reused before re-querying"
+    )
+    notion_memory_cache_persist: bool = Field(
+        default=False,
+        description="Persist the Notion memory cache to the local database for warm restarts"
+    )
+    notion_max_connections: int = Field(
+        default=10,
+        description="Maximum concurrent HTTP connections to the Notion API"
+    )
+    notion_http2: bool = Field(
+        default=True,
+        description="Use HTTP/2 for Notion requests when the h2 package is installed"
+    )
+    notion_requests_per_second: float = Field(
+        default=3.0,
+        description="Average Notion API request rate (Notion allows about 3 requests per second)"
+    )
+    notion_request_burst: int = Field(
+        default=3,
+        description="Number of Notion requests that may be sent back-to-back before throttling"
+    )
+
+    memory_retrieval_top_k: int = Field(
+        default=8,
+        description="Relevant memories added to the Stage 1 prompt besides high-importance ones (0 = include all memories)"
+    )
+    memory_prompt_token_budget: int = Field(
+        default=4000,
+        description="Approximate token budget for memories in the Stage 1 prompt"
+    )
+    memory_index_path: str = Field(
+        default="./data/memory_index.json",
+        description="Where the memory BM25 index is persisted (empty = keep in memory only)"
+    )
+
     # Anthropic (optional for web-only mode)
     anthropic_api_key: str = Field(
         default="",
@@ -72,6 +130,22 @@ class Settings(BaseSettings):
         description="Database connection URL"
     )
 
+    # Event Bus (cross-process backend for SSE progress events)
+    event_bus_url: str = Field(
+        default="",
+        description="Optional Redis URL for cross-process project events; empty = in-process only"
+    )
+
+    # Task Scheduler (bounds concurrent Claude Code executions)
+    task_max_concurrency: int = Field(
+        default=2,
+        description="Maximum number of tasks executing at the same time"
+    )
+    task_per_user_concurrency: int = Field(
+        default=1,
+        description="Maximum number of tasks executing at the same time per user"
+    )
+
     # GitHub OAuth (for Web Frontend)
     github_oauth_client_id: str = Field(
         default="",
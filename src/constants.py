@@ -9,6 +9,36 @@
 # Notion API 富文字欄位的最大長度限制
 NOTION_MAX_TEXT_LENGTH = 2000
 
+# Notion 資料庫查詢每頁筆數（API 上限 100）
+NOTION_PAGE_SIZE = 100
+
+# 記憶增量同步之間，強制完整同步的間隔（秒）；增量同步無法得知已封存的頁面
+NOTION_MEMORY_FULL_SYNC_INTERVAL_SECONDS = 3600
+
+# 增量同步時往前回溯的秒數（Notion last_edited_time 只精確到分鐘）
+NOTION_LAST_EDITED_SKEW_SECONDS = 60
+
+# 記憶重要性排序（增量同步合併後於本地排序使用）
+MEMORY_IMPORTANCE_ORDER = ("high", "medium", "low")
+
+# 記憶檢索：BM25 參數與索引檔格式版本（格式變更時遞增，使舊索引失效）
+MEMORY_BM25_K1 = 1.5
+MEMORY_BM25_B = 0.75
+MEMORY_INDEX_VERSION = 1
+
+# Notion 連線池中閒置連線的保留時間（秒）
+NOTION_KEEPALIVE_EXPIRY_SECONDS = 30
+
+# Notion 請求優先權（數字越小越優先）：狀態更新 > 一般請求 > 記憶寫入
+NOTION_PRIORITY_STATUS = 0
+NOTION_PRIORITY_DEFAULT = 10
+NOTION_PRIORITY_MEMORY = 20
+
+# Notion 請求重試（429 依 Retry-After，其餘以指數退避）
+NOTION_RETRY_MAX_ATTEMPTS = 5
+NOTION_RETRY_BASE_DELAY_SECONDS = 0.5
+NOTION_RETRY_MAX_DELAY_SECONDS = 30
+
 # ==================== Claude API 相關常數 ====================
 
 # Claude API 回應的最大 token 數
@@ -25,11 +55,43 @@ LINE_LOG_MESSAGE_LENGTH = 50
 # LINE 檔案記錄的最大訊息長度
 LINE_FILE_LOG_MESSAGE_LENGTH = 100
 
+# LINE 單則文字訊息的最大長度（超過時自動分段）
+LINE_MAX_TEXT_LENGTH = 5000
+
+# LINE 單次 reply/push 最多可帶的訊息數
+LINE_MAX_MESSAGES_PER_REQUEST = 5
+
+# 推送訊息合併的等待時間（秒）：期間內送給同一收件人的訊息合併為一次推送
+LINE_PUSH_BATCH_WINDOW_SECONDS = 0.3
+
+# 處理 LINE webhook 事件的背景 worker 數
+LINE_EVENT_WORKERS = 4
+
+# 延遲直方圖的區間上界（毫秒）
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
 # ==================== 路徑相關常數 ====================
 
 # 使用者 ID 記錄檔名稱
 USER_IDS_LOG_FILENAME = "user_ids.log"
 
+# 使用者訊息稽核日誌的 JSONL 檔名（audit_log_format=jsonl 時使用）
+AUDIT_LOG_JSONL_FILENAME = "user_ids.jsonl"
+
+# 稽核日誌：批次寫入前的等待時間（秒）、每批筆數、記憶體佇列上限
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS = 1.0
+AUDIT_LOG_BATCH_SIZE = 500
+AUDIT_LOG_QUEUE_MAX_SIZE = 10000
+
+# 上傳檔案串流讀寫的區塊大小（bytes）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 下載時小於此大小（bytes）的文字檔不壓縮
+UPLOAD_COMPRESS_MIN_SIZE = 1024
+
+# 快取的上傳檔案內容雜湊（ETag）筆數上限
+UPLOAD_HASH_CACHE_SIZE = 4096
+
 # ==================== Claude Code 服務相關常數 ====================
 
 # 任務標題最大長度（用於資料夾命名）
@@ -46,3 +108,72 @@ TASK_DEFAULT_TIMEOUT_SECONDS = 21600
 
 # 預設單次執行超時時間（秒，1 小時）
 TASK_EXECUTION_TIMEOUT_SECONDS = 3600
+
+# 任務排程優先權（數字越小越優先）：管理員
+TASK_PRIORITY_ADMIN = 0
+
+# 任務排程優先權：其他授權使用者與 Web 專案
+TASK_PRIORITY_USER = 10
+
+# Claude Code stdout 保留在記憶體中的最大字元數（完整輸出寫入 result.md）
+CLAUDE_CODE_STDOUT_BUFFER_CHARS = 1_000_000
+
+# Claude Code stderr 保留在記憶體中的最大字元數
+CLAUDE_CODE_STDERR_BUFFER_CHARS = 100_000
+
+# 讀取 Claude Code 輸出時每次讀取的位元組數
+CLAUDE_CODE_READ_CHUNK_SIZE = 64 * 1024
+
+# 打包任務資料夾時每次讀取檔案的位元組數
+TASK_ARCHIVE_CHUNK_SIZE = 256 * 1024
+
+# ==================== 專案進度串流相關常數 ====================
+
+# 每個 SSE 訂閱者的事件佇列上限
+EVENT_BUS_QUEUE_MAX_SIZE = 1000
+
+# SSE 無事件時送出 keepalive 的間隔（秒）
+SSE_KEEPALIVE_INTERVAL_SECONDS = 15
+
+# TaskLog 批次寫入的筆數上限
+TASK_LOG_BATCH_SIZE = 50
+
+# TaskLog 緩衝最長停留時間（秒）
+TASK_LOG_FLUSH_INTERVAL_SECONDS = 0.5
+
+# ==================== 分頁相關常數 ====================
+
+# 專案列表預設每頁筆數
+PROJECT_PAGE_DEFAULT_LIMIT = 20
+
+# 專案列表每頁筆數上限
+PAGE_MAX_LIMIT = 100
+
+# 日誌分頁預設每頁筆數
+TASK_LOG_PAGE_DEFAULT_LIMIT = 200
+
+# 日誌分頁每頁筆數上限
+TASK_LOG_PAGE_MAX_LIMIT = 1000
+
+# 完整日誌串流時每次查詢的筆數
+TASK_LOG_STREAM_PAGE_SIZE = 500
+
+# ==================== 持久化任務佇列相關常數 ====================
+
+# 任務租約長度（秒），逾時未續約視為 worker 已中斷
+JOB_LEASE_SECONDS = 60
+
+# 執行中任務的心跳（續約）間隔（秒）
+JOB_HEARTBEAT_INTERVAL_SECONDS = 20
+
+# 輪詢佇列與回收逾時租約的間隔（秒）
+JOB_POLL_INTERVAL_SECONDS = 5
+
+# 任務失敗後重新排入佇列的延遲（秒，乘以已嘗試次數）
+JOB_RETRY_DELAY_SECONDS = 30
+
+# 每個任務的最大嘗試次數
+JOB_MAX_ATTEMPTS = 3
+
+# 每個程序同時執行的任務數上限
+JOB_MAX_CONCURRENT = 4
@@ -1,4 +1,17 @@
-from src.database.session import get_db, engine
-from src.database.models import Base, User, Project, TaskLog
+from src.database.session import get_db, engine, async_engine, SessionLocal, AsyncSessionLocal
+from src.database.models import Base, User, Project, TaskLog, TaskJob, NotionMemory, TaskFolder
 
-__all__ = ["get_db", "engine", "Base", "User", "Project", "TaskLog"]
+__all__ = [
+    "get_db",
+    "engine",
+    "async_engine",
+    "SessionLocal",
+    "AsyncSessionLocal",
+    "Base",
+    "User",
+    "Project",
+    "TaskLog",
+    "TaskJob",
+    "NotionMemory",
+    "TaskFolder"
+]
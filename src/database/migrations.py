@@ -0,0 +1,57 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.engine import Connection
+from src.database.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(connection: Connection) -> list[str]:
+    """
+    Create indexes declared on the models that are missing from existing tables.
+    Base.metadata.create_all() skips tables that already exist, so indexes added
+    after a database was first created are never built without this step.
+    Works on both SQLite and PostgreSQL; returns the names of created indexes.
+    """
+    inspector = inspect(connection)
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            logger.info(f"Creating index {index.name} on {table.name}")
+            index.create(bind=connection)
+            created.append(index.name)
+
+    return created
+
+
+def ensure_columns(connection: Connection) -> list[str]:
+    """
+    Add nullable columns declared on the models that are missing from existing tables.
+    Only nullable columns without server defaults are added (plain ALTER TABLE ADD COLUMN,
+    supported by both SQLite and PostgreSQL); returns "table.column" names added.
+    """
+    inspector = inspect(connection)
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            logger.info(f"Adding column {table.name}.{column.name}")
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+            added.append(f"{table.name}.{column.name}")
+
+    return added
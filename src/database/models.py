@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
@@ -15,6 +15,13 @@ class TaskStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -32,6 +39,10 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # list_projects: WHERE owner_id = ? ORDER BY created_at DESC
+        Index("ix_projects_owner_id_created_at", "owner_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -61,6 +72,10 @@ class Project(Base):
 
 class TaskLog(Base):
     __tablename__ = "task_logs"
+    __table_args__ = (
+        # logs / stream: WHERE project_id = ? ORDER BY id
+        Index("ix_task_logs_project_id_id", "project_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -70,3 +85,73 @@ class TaskLog(Base):
 
     # Relationships
     project = relationship("Project", back_populates="logs")
+
+
+class TaskJob(Base):
+    """Durable background job (LINE messages, web projects) with lease/heartbeat."""
+    __tablename__ = "task_jobs"
+    __table_args__ = (
+        # job_queue claim: WHERE status = 'queued' AND available_at <= now
+        Index("ix_task_jobs_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON string of handler arguments
+    owner = Column(String(100), nullable=True)
+    priority = Column(Integer, nullable=True)  # lower claims first; NULL = TASK_PRIORITY_USER
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+
+    # Delivery
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    worker_id = Column(String(200), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+
+class NotionMemory(Base):
+    """Local copy of the Notion Memory database (NotionService read-through cache)."""
+    __tablename__ = "notion_memories"
+
+    page_id = Column(String(64), primary_key=True)
+    title = Column(String(500), nullable=False)
+    category = Column(String(100), nullable=True)
+    content = Column(Text, nullable=True)
+    importance = Column(String(50), nullable=True)
+    updated_at = Column(String(64), nullable=True)  # Notion UpdatedAt property (ISO 8601)
+    last_edited_time = Column(String(64), nullable=True)  # Notion page last_edited_time
+    position = Column(Integer, nullable=False)  # order returned by Notion query sorts
+    synced_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TaskFolder(Base):
+    """Registry of Claude Code task folders under tasks/ (reservation + metadata, no directory walks)."""
+    __tablename__ = "task_folders"
+    __table_args__ = (
+        # next duplicate suffix: MAX(suffix) WHERE base_name = ?
+        Index("ix_task_folders_base_name_suffix", "base_name", "suffix"),
+        Index("ix_task_folders_created_at_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    folder_name = Column(String(200), unique=True, nullable=False)
+    base_name = Column(String(200), nullable=False)  # <date>_<title> without the duplicate suffix
+    suffix = Column(Integer, default=0, nullable=False)  # 0 = no suffix, n = "_n"
+    title = Column(String(500), nullable=True)
+    prompt_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the task prompt
+    status = Column(SQLEnum(TaskStatus), nullable=True)  # NULL: registered from an existing folder
+    return_code = Column(Integer, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    file_count = Column(Integer, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
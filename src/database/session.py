@@ -1,9 +1,24 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from typing import AsyncGenerator
 from src.config import settings
 
-# Create engine
+
+def _async_database_url(url: str) -> str:
+    """
+    Map settings.database_url to its async driver.
+    sqlite → aiosqlite, postgres/postgresql → asyncpg.
+    """
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg://", 1)
+    return url
+
+
+# Create engine (sync: background task processors and scripts)
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
@@ -11,20 +26,31 @@ engine = create_engine(
     echo=settings.app_env == "development"
 )
 
-# Create session factory
+# Create async engine (API routers)
+async_engine = create_async_engine(
+    _async_database_url(settings.database_url),
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    echo=settings.app_env == "development"
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency for getting database session.
+    Dependency for getting an async database session.
     Usage:
         @app.get("/items")
-        def read_items(db: Session = Depends(get_db)):
+        async def read_items(db: AsyncSession = Depends(get_db)):
+            result = await db.execute(select(Item))
             ...
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -9,7 +9,18 @@ from src.api.line_webhook import router as line_router
 from src.api.auth import router as auth_router
 from src.api.projects import router as projects_router
 from src.api.uploads import router as uploads_router
-from src.database import engine, Base
+from src.api.tasks import router as tasks_router
+from src.api.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
+from src.database import async_engine, Base
+from src.database.migrations import ensure_columns, ensure_indexes
+from src.services.audit_log import audit_log
+from src.services.claude_code_service import claude_code_service
+from src.services.event_bus import event_bus
+from src.services.job_queue import job_queue
+from src.services.line_event_queue import line_event_queue
+from src.services.line_service import line_service
+from src.services.notion_service import notion_service
+from src.services.web_task_processor import resume_interrupted_projects
 
 # Configure logging
 logging.basicConfig(
@@ -27,12 +38,45 @@ async def lifespan(app: FastAPI):
 
     # Create database tables
     try:
-        Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            added_columns = await conn.run_sync(ensure_columns)
+            created_indexes = await conn.run_sync(ensure_indexes)
         logger.info("Database tables created successfully")
+        if added_columns:
+            logger.info(f"Added missing columns: {', '.join(added_columns)}")
+        if created_indexes:
+            logger.info(f"Created missing indexes: {', '.join(created_indexes)}")
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
 
+    # Register task folders created before the registry existed
+    try:
+        registered = await claude_code_service.folders.sync_existing()
+        if registered:
+            logger.info(f"Registered {registered} existing task folders")
+    except Exception as e:
+        logger.error(f"Failed to register existing task folders: {e}")
+
+    await event_bus.start()
+
+    # Durable job queue: requeue interrupted jobs and resume unfinished projects
+    await job_queue.start()
+    resumed = await resume_interrupted_projects()
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished projects")
+
+    await audit_log.start()
+    await line_event_queue.start()
+
     yield
+    await line_event_queue.stop()
+    await audit_log.stop()
+    await job_queue.stop()
+    await event_bus.stop()
+    await notion_service.aclose()
+    await line_service.aclose()
+    await async_engine.dispose()
     logger.info("Shutting down Joey's AI Agent")
 
 
@@ -51,6 +95,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER],
 )
 
 # Include routers
@@ -59,6 +104,7 @@ app.include_router(line_router)
 app.include_router(auth_router)
 app.include_router(projects_router)
 app.include_router(uploads_router)
+app.include_router(tasks_router)
 
 
 if __name__ == "__main__":
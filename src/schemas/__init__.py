@@ -5,11 +5,13 @@ from src.schemas.project import (
     TaskLogResponse,
     UserResponse
 )
+from src.schemas.task_folder import TaskFolderResponse
 
 __all__ = [
     "ProjectCreate",
     "ProjectUpdate",
     "ProjectResponse",
     "TaskLogResponse",
-    "UserResponse"
+    "UserResponse",
+    "TaskFolderResponse"
 ]
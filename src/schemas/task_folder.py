@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from src.database.models import TaskStatus
+
+
+class TaskFolderResponse(BaseModel):
+    id: int
+    folder_name: str
+    title: Optional[str]
+    prompt_hash: Optional[str]
+    status: Optional[TaskStatus]
+    return_code: Optional[int]
+    size_bytes: Optional[int]
+    file_count: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,177 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from src.config import settings
+from src.constants import (
+    AUDIT_LOG_BATCH_SIZE,
+    AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+    AUDIT_LOG_JSONL_FILENAME,
+    AUDIT_LOG_QUEUE_MAX_SIZE,
+    USER_IDS_LOG_FILENAME,
+)
+
+logger = logging.getLogger(__name__)
+
+# 專案根目錄（從 src/services/ 往上兩層）
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+class AuditLog:
+    """
+    非同步稽核日誌（收到的 LINE 訊息）
+
+    write() 只把紀錄放進記憶體佇列；背景 flusher 批次寫入檔案（在 thread 中
+    執行，不阻塞事件循環）。檔案超過大小或時間上限時輪替，舊檔以 gzip 壓縮，
+    只保留最近 backup_count 份。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fmt: str = "text",
+        max_bytes: int = 10 * 1024 * 1024,
+        rotate_interval_seconds: float = 86400,
+        backup_count: int = 14
+    ):
+        self.path = path
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.rotate_interval_seconds = rotate_interval_seconds
+        self.backup_count = backup_count
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=AUDIT_LOG_QUEUE_MAX_SIZE)
+        self._flusher: Optional[asyncio.Task] = None
+        # 目前檔案的開始時間；第一次寫入時由檔案推算，重啟程序不會重新計時
+        self._segment_started_at: Optional[float] = None
+        self._write_lock = threading.Lock()
+        self.dropped = 0
+
+    # ==================== 寫入 ====================
+
+    def write(self, **record) -> None:
+        """加入一筆紀錄（不等待寫入；佇列滿時捨棄並計數）"""
+        record = {"ts": datetime.utcnow().isoformat(timespec="milliseconds") + "Z", **record}
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Audit log queue full, dropped {self.dropped} records")
+
+    def _format(self, record: dict) -> str:
+        if self.fmt == "jsonl":
+            return json.dumps(record, ensure_ascii=False)
+        return f"User ID: {record.get('user_id')}, Message: {record.get('message', '')}"
+
+    # ==================== 生命週期 ====================
+
+    async def start(self) -> None:
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """停止 flusher 並寫出剩餘紀錄"""
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self._flush_pending()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            record = await self._queue.get()
+            try:
+                # 等待一小段時間累積批次，減少寫檔次數
+                await asyncio.sleep(AUDIT_LOG_FLUSH_INTERVAL_SECONDS)
+            finally:
+                # 被 stop() 取消時，已取出的紀錄也要寫出
+                try:
+                    await self._flush_pending(first=record)
+                except Exception as e:
+                    logger.error(f"Audit log flush failed: {e}")
+
+    async def _flush_pending(self, first: Optional[dict] = None) -> None:
+        records = [first] if first else []
+        while not self._queue.empty():
+            records.append(self._queue.get_nowait())
+
+        for start in range(0, len(records), AUDIT_LOG_BATCH_SIZE):
+            lines = [self._format(record) for record in records[start:start + AUDIT_LOG_BATCH_SIZE]]
+            await asyncio.to_thread(self._write_lines, lines)
+
+    # ==================== 檔案操作（於 thread 中執行）====================
+
+    def _write_lines(self, lines: list[str]) -> None:
+        with self._write_lock:
+            if self._should_rotate():
+                self._rotate()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def _should_rotate(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size == 0:
+            return False
+        if self._segment_started_at is None:
+            self._segment_started_at = self._segment_start()
+        return (
+            size >= self.max_bytes
+            or time.time() - self._segment_started_at >= self.rotate_interval_seconds
+        )
+
+    def _segment_start(self) -> float:
+        """
+        推算目前檔案的開始時間：最近一次輪替的時間（備份檔名中的時間戳），
+        沒有備份時取 jsonl 第一筆紀錄的 ts，都無法取得時使用檔案的修改時間。
+        """
+        backups = sorted(self.path.parent.glob(f"{self.path.name}.*.gz"))
+        if backups:
+            stamp = backups[-1].name[len(self.path.name) + 1:-len(".gz")]
+            try:
+                return datetime.strptime(stamp, "%Y%m%d-%H%M%S").timestamp()
+            except ValueError:
+                pass
+        if self.fmt == "jsonl":
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    ts = json.loads(f.readline())["ts"]
+                return datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=timezone.utc).timestamp()
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self.path.stat().st_mtime
+
+    def _rotate(self) -> None:
+        """將目前檔案改名並壓縮為 <name>.<時間>.gz，刪除超過保留數量的舊檔"""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}")
+        os.replace(self.path, rotated)
+        self._segment_started_at = time.time()
+
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+        logger.info(f"Rotated audit log to {rotated.name}.gz")
+
+        backups = sorted(self.path.parent.glob(f"{self.path.name}.*.gz"))
+        for old in backups[:-self.backup_count] if self.backup_count else backups:
+            old.unlink()
+
+
+audit_log = AuditLog(
+    path=PROJECT_ROOT / (AUDIT_LOG_JSONL_FILENAME if settings.audit_log_format == "jsonl" else USER_IDS_LOG_FILENAME),
+    fmt=settings.audit_log_format,
+    max_bytes=settings.audit_log_max_bytes,
+    rotate_interval_seconds=settings.audit_log_rotate_hours * 3600,
+    backup_count=settings.audit_log_backup_count
+)
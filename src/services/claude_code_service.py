@@ -1,15 +1,49 @@
 import asyncio
+import codecs
+import inspect
 import logging
 import os
-from datetime import datetime
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import IO, Awaitable, Callable, Optional
 
 from src.config import settings
+from src.database.models import TaskStatus
+from src.constants import (
+    CLAUDE_CODE_READ_CHUNK_SIZE,
+    CLAUDE_CODE_STDOUT_BUFFER_CHARS,
+    CLAUDE_CODE_STDERR_BUFFER_CHARS,
+)
+from src.services.task_folder_registry import TaskFolderRegistry
 
 logger = logging.getLogger(__name__)
 
 
+class OutputRingBuffer:
+    """Keeps only the most recent `max_chars` characters of a line stream."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self._lines: deque[str] = deque()
+        self._size = 0
+        self.truncated = False
+
+    def append(self, line: str) -> None:
+        self._lines.append(line)
+        self._size += len(line)
+        while self._size > self.max_chars and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft())
+            self.truncated = True
+
+    def getvalue(self) -> str:
+        return "".join(self._lines)
+
+
+def _write_and_flush(file_obj: IO[str], text: str) -> None:
+    file_obj.write(text)
+    file_obj.flush()
+
+
 class ClaudeCodeService:
     """Service for executing tasks via Claude Code CLI."""
 
@@ -19,22 +53,68 @@ class ClaudeCodeService:
         self.project_dir = Path(__file__).parent.parent.parent  # Go up from services/ to project root
         self.tasks_dir = self.project_dir / "tasks"
         self.tasks_dir.mkdir(exist_ok=True)
-
-    def _create_task_folder(self, title: str) -> Path:
-        """Create a folder for the task."""
-        date_str = datetime.now().strftime("%Y-%m-%d")
-        safe_title = "".join(c if c.isalnum() or c in "-_" else "_" for c in title)[:50]
-        folder_name = f"{date_str}_{safe_title}"
-        task_folder = self.tasks_dir / folder_name
-
-        # Handle duplicate folder names
-        counter = 1
-        while task_folder.exists():
-            task_folder = self.tasks_dir / f"{folder_name}_{counter}"
-            counter += 1
-
-        task_folder.mkdir(parents=True)
-        return task_folder
+        self.folders = TaskFolderRegistry(self.tasks_dir)
+
+    async def _create_task_folder(self, title: str, prompt: str = "") -> Path:
+        """Create (and register) a folder for the task."""
+        return await self.folders.reserve(title, prompt)
+
+    async def _finish_task_folder(self, task_folder: Path, result: dict) -> dict:
+        """Record the outcome of a task in the folder registry and pass the result through."""
+        status = TaskStatus.COMPLETED if result["success"] else TaskStatus.FAILED
+        await self.folders.complete(task_folder, status, result.get("return_code"))
+        return result
+
+    @staticmethod
+    async def _notify_progress(on_progress: Optional[callable], line: str) -> None:
+        """Forward a line of output to the progress callback (sync or async)."""
+        if on_progress is None:
+            return
+        try:
+            result = on_progress(line)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
+
+    @staticmethod
+    async def _read_stream(
+        stream: asyncio.StreamReader,
+        sink: "OutputRingBuffer",
+        on_line: Optional[Callable[[str], Awaitable[None]]] = None,
+        file_obj: Optional[IO[str]] = None
+    ) -> None:
+        """
+        Read a subprocess pipe in chunks and split it into lines.
+        Chunked reads avoid StreamReader.readline()'s 64 KiB line limit.
+        Complete lines of each chunk are appended to file_obj in one write,
+        off the event loop.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+
+        while True:
+            chunk = await stream.read(CLAUDE_CODE_READ_CHUNK_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                pending += text
+                *lines, pending = pending.split("\n")
+                lines = [line + "\n" for line in lines]
+                if file_obj and lines:
+                    await asyncio.to_thread(_write_and_flush, file_obj, "".join(lines))
+                for line in lines:
+                    sink.append(line)
+                    if on_line:
+                        await on_line(line)
+            if not chunk:
+                break
+
+        if pending:
+            if file_obj:
+                await asyncio.to_thread(_write_and_flush, file_obj, pending)
+            sink.append(pending)
+            if on_line:
+                await on_line(pending)
 
     async def execute_task(
         self,
@@ -48,12 +128,12 @@ class ClaudeCodeService:
         Args:
             prompt: The structured prompt for Claude Code
             title: Task title for folder naming
-            on_progress: Optional callback for progress updates
+            on_progress: Optional callback (sync or async) called with each line of stdout
 
         Returns:
             dict with keys: success, output, folder_path, error
         """
-        task_folder = self._create_task_folder(title)
+        task_folder = await self._create_task_folder(title, prompt)
         logger.info(f"Created task folder: {task_folder}")
 
         # Add automated execution prefix to prompt
@@ -374,16 +454,42 @@ NEXT_ACTION: [下一步要做什麼]
                 env=env
             )
 
-            stdout, stderr = await process.communicate()
-            output = stdout.decode("utf-8")
-            error_output = stderr.decode("utf-8")
-
-            # Write result.md
+            # Stream stdout/stderr line by line: forward progress, append to
+            # result.md as it arrives, and keep only the tail in memory
             result_file = task_folder / "result.md"
-            result_content = f"# Result\n\n## Output\n\n{output}"
-            if error_output:
-                result_content += f"\n\n## Errors\n\n{error_output}"
-            result_file.write_text(result_content)
+            stdout_tail = OutputRingBuffer(CLAUDE_CODE_STDOUT_BUFFER_CHARS)
+            stderr_tail = OutputRingBuffer(CLAUDE_CODE_STDERR_BUFFER_CHARS)
+
+            try:
+                with result_file.open("w", encoding="utf-8") as result_fp:
+                    await asyncio.to_thread(_write_and_flush, result_fp, "# Result\n\n## Output\n\n")
+
+                    async def on_stdout_line(line: str) -> None:
+                        await self._notify_progress(on_progress, line)
+
+                    await asyncio.gather(
+                        self._read_stream(process.stdout, stdout_tail, on_stdout_line, result_fp),
+                        self._read_stream(process.stderr, stderr_tail)
+                    )
+                    await process.wait()
+
+                    error_output = stderr_tail.getvalue()
+                    if error_output:
+                        if stderr_tail.truncated:
+                            error_output = f"...(truncated)\n{error_output}"
+                        await asyncio.to_thread(_write_and_flush, result_fp, f"\n\n## Errors\n\n{error_output}")
+            finally:
+                # Timeout or cancellation: don't leave the CLI running
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+            output = stdout_tail.getvalue()
+            if stdout_tail.truncated:
+                logger.info(
+                    f"Claude Code output exceeded {CLAUDE_CODE_STDOUT_BUFFER_CHARS} chars; "
+                    f"full output in {result_file}"
+                )
 
             success = process.returncode == 0
 
@@ -392,32 +498,36 @@ NEXT_ACTION: [下一步要做什麼]
             else:
                 logger.warning(f"Claude Code exited with code {process.returncode}")
 
-            return {
+            return await self._finish_task_folder(task_folder, {
                 "success": success,
                 "output": output,
                 "folder_path": str(task_folder),
                 "error": error_output if error_output else None,
                 "return_code": process.returncode
-            }
+            })
 
         except asyncio.TimeoutError:
             logger.error("Claude Code execution timed out")
-            return {
+            return await self._finish_task_folder(task_folder, {
                 "success": False,
                 "output": "",
                 "folder_path": str(task_folder),
                 "error": "Execution timed out",
                 "return_code": -1
-            }
+            })
+        except asyncio.CancelledError:
+            # execute_task_with_timeout cancels the task when it times out
+            await self.folders.complete(task_folder, TaskStatus.CANCELLED)
+            raise
         except Exception as e:
             logger.error(f"Error executing Claude Code: {e}", exc_info=True)
-            return {
+            return await self._finish_task_folder(task_folder, {
                 "success": False,
                 "output": "",
                 "folder_path": str(task_folder),
                 "error": str(e),
                 "return_code": -1
-            }
+            })
 
     async def execute_task_with_timeout(
         self,
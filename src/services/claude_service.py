@@ -29,20 +29,34 @@ class ClaudeService:
     async def process_task(
         self,
         user_input: str,
-        memories: str
+        memories: str,
+        relevant_memories: str = ""
     ) -> ClaudeResponse:
-        """Process a task with Claude and return structured response."""
+        """
+        Process a task with Claude and return structured response.
+        memories is the stable (cached) block; relevant_memories changes per task.
+        """
         logger.info(f"呼叫 Claude API，模型: {self.model}")
         logger.debug(f"使用者輸入: {user_input[:100]}...")
 
-        # Build the user message with context
-        user_message = f"""## Joey 的記憶
+        # Build the user message with context.
+        # 系統提示與記憶區塊在連續訊息間通常不變，標記為可快取的前綴；
+        # 每次不同的相關記憶與任務內容放在最後一個不快取的區塊。
+        memory_block = f"""## Joey 的記憶
 
 {memories}
 
 ---
 
-## Joey 的任務
+"""
+        relevant_block = f"""## 與此任務相關的記憶
+
+{relevant_memories}
+
+---
+
+""" if relevant_memories else ""
+        task_block = f"""{relevant_block}## Joey 的任務
 
 {user_input}
 
@@ -53,14 +67,31 @@ class ClaudeService:
         try:
             # Call Claude API (使用 to_thread 避免阻塞事件循環)
             response = await asyncio.to_thread(
-                self.client.messages.create,
+                self.client.beta.prompt_caching.messages.create,
                 model=self.model,
                 max_tokens=CLAUDE_MAX_TOKENS,
-                system=self.system_prompt,
+                system=[
+                    {
+                        "type": "text",
+                        "text": self.system_prompt,
+                        "cache_control": {"type": "ephemeral"}
+                    }
+                ],
                 messages=[
-                    {"role": "user", "content": user_message}
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": memory_block,
+                                "cache_control": {"type": "ephemeral"}
+                            },
+                            {"type": "text", "text": task_block}
+                        ]
+                    }
                 ]
             )
+            self._log_usage(response.usage)
 
             # Extract text content
             content = response.content[0].text
@@ -75,6 +106,17 @@ class ClaudeService:
             logger.error(f"Claude API 呼叫失敗: {e}", exc_info=True)
             raise
 
+    @staticmethod
+    def _log_usage(usage) -> None:
+        """記錄 token 用量與 prompt cache 命中情況"""
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        logger.info(
+            f"Claude API token 用量 - input: {usage.input_tokens}, output: {usage.output_tokens}, "
+            f"cache read: {cache_read}, cache write: {cache_write} "
+            f"({'hit' if cache_read else 'miss'})"
+        )
+
     def _parse_json_response(self, content: str) -> ClaudeResponse:
         """Parse JSON response from Claude, handling various formats."""
 
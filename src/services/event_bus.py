@@ -0,0 +1,182 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from src.config import settings
+from src.constants import EVENT_BUS_QUEUE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+DeliverCallback = Callable[[int, dict], None]
+
+# 訂閱者佇列滿時，清空佇列並改放此事件；訂閱者收到後應重新查詢目前狀態
+RESYNC_EVENT_TYPE = "resync"
+
+
+class EventBackend(ABC):
+    """跨程序事件後端介面（預設不使用，僅在多 worker 部署時需要）"""
+
+    @abstractmethod
+    async def start(self, deliver: DeliverCallback) -> None:
+        """開始接收其他程序發布的事件，收到後呼叫 deliver(project_id, event)"""
+
+    @abstractmethod
+    async def publish(self, project_id: int, event: dict) -> None:
+        """將事件發布給其他程序"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """停止接收事件並釋放連線"""
+
+
+class RedisEventBackend(EventBackend):
+    """以 Redis Pub/Sub 在多個 worker 之間轉送專案事件"""
+
+    CHANNEL_PREFIX = "joey-ai-agent:project:"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BUS_URL 需要安裝 redis 套件 (pip install redis)") from e
+
+        self.redis = aioredis.from_url(url)
+        self.origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        pubsub = self.redis.pubsub()
+        await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        self._listener = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _listen(self, pubsub, deliver: DeliverCallback) -> None:
+        async for message in pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            try:
+                payload = json.loads(message["data"])
+                # 自己發布的事件已在本地送出，忽略以避免重複
+                if payload.get("origin") == self.origin:
+                    continue
+                deliver(int(payload["project_id"]), payload["event"])
+            except Exception as e:
+                logger.error(f"解析跨程序事件失敗: {e}")
+
+    async def publish(self, project_id: int, event: dict) -> None:
+        payload = json.dumps({
+            "origin": self.origin,
+            "project_id": project_id,
+            "event": event
+        })
+        await self.redis.publish(f"{self.CHANNEL_PREFIX}{project_id}", payload)
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        await self.redis.aclose()
+
+
+class EventBus:
+    """
+    專案進度事件匯流排
+
+    WebTaskProcessor 寫入日誌與狀態時發布事件，SSE 端點訂閱後即時推送，
+    閒置的串流不會產生任何資料庫查詢。
+    """
+
+    def __init__(self, backend: Optional[EventBackend] = None):
+        self.backend = backend
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        """綁定事件循環並啟動跨程序後端（於 lifespan 呼叫）"""
+        self._loop = asyncio.get_running_loop()
+        if self.backend:
+            await self.backend.start(self._deliver)
+            logger.info(f"Event bus backend started: {type(self.backend).__name__}")
+
+    async def stop(self) -> None:
+        """停止跨程序後端"""
+        if self.backend:
+            await self.backend.stop()
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: int) -> AsyncIterator[asyncio.Queue]:
+        """訂閱指定專案的事件，離開 context 時自動取消訂閱"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_BUS_QUEUE_MAX_SIZE)
+        self._subscribers[project_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+    def publish(self, project_id: int, event: dict) -> None:
+        """
+        發布事件給所有訂閱者（非阻塞，可在同步程式碼中呼叫）
+        """
+        self._dispatch(self._deliver, project_id, event)
+
+        if self.backend:
+            self._dispatch(self._publish_remote, project_id, event)
+
+    def _dispatch(self, func: Callable, project_id: int, event: dict) -> None:
+        """在事件循環執行緒中執行 func，必要時跨執行緒排程"""
+        if self._loop is None or self._loop.is_closed():
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            func(project_id, event)
+        else:
+            self._loop.call_soon_threadsafe(func, project_id, event)
+
+    def _deliver(self, project_id: int, event: dict) -> None:
+        """將事件放入本地訂閱者的佇列"""
+        for queue in list(self._subscribers.get(project_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 已無法保證順序與完整性（可能丟掉終止狀態），改要求訂閱者重新同步
+                logger.warning(f"[Project {project_id}] 訂閱者佇列已滿，要求重新同步")
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": RESYNC_EVENT_TYPE})
+
+    def _publish_remote(self, project_id: int, event: dict) -> None:
+        task = asyncio.ensure_future(self.backend.publish(project_id, event))
+        task.add_done_callback(self._log_publish_error)
+
+    @staticmethod
+    def _log_publish_error(task: Awaitable) -> None:
+        if not task.cancelled() and task.exception():
+            logger.error(f"跨程序事件發布失敗: {task.exception()}")
+
+
+def _create_backend() -> Optional[EventBackend]:
+    """依設定建立跨程序後端，未設定時僅使用程序內匯流排"""
+    url = settings.event_bus_url
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://")):
+        return RedisEventBackend(url)
+    raise ValueError(f"Unsupported EVENT_BUS_URL scheme: {url}")
+
+
+event_bus = EventBus(backend=_create_backend())
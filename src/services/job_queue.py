@@ -0,0 +1,312 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+
+from src.config import settings
+
+from src.constants import (
+    JOB_HEARTBEAT_INTERVAL_SECONDS,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_CONCURRENT,
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_RETRY_DELAY_SECONDS,
+    TASK_PRIORITY_USER,
+)
+from src.database.models import JobStatus, TaskJob
+from src.database.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+# 領取順序用的優先權；priority 欄位加入前的舊資料視為一般使用者
+_job_priority = func.coalesce(TaskJob.priority, TASK_PRIORITY_USER)
+
+
+class JobQueue:
+    """
+    持久化任務佇列（存放於 task_jobs 資料表）
+
+    任務以租約方式被 worker 領取，執行期間定期心跳續約；程序重啟或當機時，
+    租約到期的任務會重新排入佇列（at-least-once），因此 handler 必須可重複執行。
+
+    領取順序為優先權（數字越小越優先）再依提交順序；已有 task_per_user_concurrency
+    筆任務在執行的 owner 會被跳過，避免單一使用者的任務佔滿所有執行名額。
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._handlers: dict[str, JobHandler] = {}
+        self._wakeup = asyncio.Event()
+        self._poller: Optional[asyncio.Task] = None
+        self._active: dict[int, asyncio.Task] = {}
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """註冊任務類型的處理函數，handler 以 payload dict 呼叫"""
+        self._handlers[job_type] = handler
+
+    # ==================== 提交 ====================
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: dict,
+        owner: Optional[str] = None,
+        priority: int = TASK_PRIORITY_USER,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> int:
+        """寫入一筆任務並喚醒輪詢，回傳 job id"""
+        async with AsyncSessionLocal() as db:
+            job = TaskJob(
+                job_type=job_type,
+                payload=json.dumps(payload, ensure_ascii=False),
+                owner=owner,
+                priority=priority,
+                max_attempts=max_attempts
+            )
+            db.add(job)
+            await db.commit()
+            job_id = job.id
+
+        logger.info(f"Enqueued job #{job_id} ({job_type}) for {owner}")
+        self._wakeup.set()
+        return job_id
+
+    async def pending_payloads(self, job_type: str) -> list[dict]:
+        """取得尚未結束（QUEUED/RUNNING）的任務 payload，用於避免重複排入"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TaskJob.payload).where(
+                    TaskJob.job_type == job_type,
+                    TaskJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+                )
+            )
+            return [json.loads(payload) for payload in result.scalars()]
+
+    async def position(self, job_type: str, payload: dict) -> Optional[tuple[JobStatus, Optional[int]]]:
+        """
+        未結束任務的 (狀態, 排隊位置)；位置依領取順序從 1 開始，執行中為 None。
+        沒有對應的 QUEUED/RUNNING 任務時回傳 None。
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TaskJob.id, TaskJob.status, _job_priority)
+                .where(
+                    TaskJob.job_type == job_type,
+                    TaskJob.payload == json.dumps(payload, ensure_ascii=False),
+                    TaskJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+                )
+                .order_by(TaskJob.id.desc())
+                .limit(1)
+            )
+            row = result.first()
+            if row is None:
+                return None
+            job_id, status, priority = row
+            if status != JobStatus.QUEUED:
+                return status, None
+
+            ahead = await db.execute(
+                select(func.count(TaskJob.id)).where(
+                    TaskJob.status == JobStatus.QUEUED,
+                    or_(
+                        _job_priority < priority,
+                        and_(_job_priority == priority, TaskJob.id < job_id)
+                    )
+                )
+            )
+            return status, ahead.scalar() + 1
+
+    # ==================== 生命週期 ====================
+
+    async def start(self) -> None:
+        """回收租約已過期的任務並開始輪詢（於 lifespan 呼叫）"""
+        recovered = await self._recover()
+        if recovered:
+            logger.info(f"Requeued {recovered} interrupted jobs")
+        self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """停止輪詢並取消執行中的任務，將它們放回佇列（不計入嘗試次數）"""
+        if self._poller:
+            self._poller.cancel()
+        tasks = list(self._active.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(TaskJob)
+                    .where(TaskJob.status == JobStatus.RUNNING, TaskJob.worker_id == self.worker_id)
+                    .values(
+                        status=JobStatus.QUEUED,
+                        worker_id=None,
+                        lease_expires_at=None,
+                        available_at=datetime.utcnow(),
+                        attempts=TaskJob.attempts - 1
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            # 放回失敗時由其他 worker 在租約到期後回收
+            logger.warning(f"Failed to release running jobs: {e}")
+
+    # ==================== 輪詢與領取 ====================
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self._recover()
+                while len(self._active) < JOB_MAX_CONCURRENT and await self._claim_and_run():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue poll failed: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _recover(self) -> int:
+        """
+        將租約已過期的 RUNNING 任務重新排入佇列（worker 已中斷，例如程序當機）。
+        執行中的任務會持續心跳續約，因此不會回收到其他 worker 仍在執行的任務。
+        """
+        now = datetime.utcnow()
+        condition = TaskJob.lease_expires_at < now
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(TaskJob)
+                .where(TaskJob.status == JobStatus.RUNNING, condition)
+                .values(status=JobStatus.QUEUED, worker_id=None, lease_expires_at=None, available_at=now)
+            )
+            await db.commit()
+            return result.rowcount
+
+    async def _claim_and_run(self) -> bool:
+        """依優先權領取一筆可執行的任務並在背景執行；沒有任務時回傳 False"""
+        now = datetime.utcnow()
+        # 已達每位使用者同時執行上限的 owner（跨所有 worker 計算）
+        busy_owners = (
+            select(TaskJob.owner)
+            .where(TaskJob.status == JobStatus.RUNNING, TaskJob.owner.is_not(None))
+            .group_by(TaskJob.owner)
+            .having(func.count(TaskJob.id) >= settings.task_per_user_concurrency)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TaskJob.id)
+                .where(
+                    TaskJob.status == JobStatus.QUEUED,
+                    TaskJob.available_at <= now,
+                    or_(TaskJob.owner.is_(None), TaskJob.owner.not_in(busy_owners))
+                )
+                .order_by(_job_priority.asc(), TaskJob.id.asc())
+                .limit(1)
+            )
+            job_id = result.scalar()
+            if job_id is None:
+                return False
+
+            # Compare-and-set: only one worker wins the claim
+            claimed = await db.execute(
+                update(TaskJob)
+                .where(TaskJob.id == job_id, TaskJob.status == JobStatus.QUEUED)
+                .values(
+                    status=JobStatus.RUNNING,
+                    worker_id=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    attempts=TaskJob.attempts + 1
+                )
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return True
+
+            job = await db.get(TaskJob, job_id)
+
+        self._active[job.id] = asyncio.create_task(self._run(job))
+        return True
+
+    # ==================== 執行 ====================
+
+    async def _run(self, job: TaskJob) -> None:
+        handler = self._handlers.get(job.job_type)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type '{job.job_type}'")
+            logger.info(f"Running job #{job.id} ({job.job_type}), attempt {job.attempts}/{job.max_attempts}")
+            await handler(json.loads(job.payload))
+            await self._finish(job.id, JobStatus.COMPLETED)
+        except asyncio.CancelledError:
+            # 程序關閉：由 stop() 放回佇列
+            raise
+        except Exception as e:
+            logger.error(f"Job #{job.id} ({job.job_type}) failed: {e}", exc_info=True)
+            if job.attempts < job.max_attempts:
+                await self._finish(
+                    job.id,
+                    JobStatus.QUEUED,
+                    error=str(e),
+                    retry_at=datetime.utcnow() + timedelta(seconds=JOB_RETRY_DELAY_SECONDS * job.attempts)
+                )
+            else:
+                await self._finish(job.id, JobStatus.FAILED, error=str(e))
+        finally:
+            heartbeat.cancel()
+            self._active.pop(job.id, None)
+            # 空出執行名額，讓輪詢立即領取下一筆
+            self._wakeup.set()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """定期延長租約，證明此 worker 仍在執行"""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(TaskJob)
+                        .where(and_(TaskJob.id == job_id, TaskJob.worker_id == self.worker_id))
+                        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job #{job_id}: {e}")
+
+    async def _finish(
+        self,
+        job_id: int,
+        status: JobStatus,
+        error: Optional[str] = None,
+        retry_at: Optional[datetime] = None
+    ) -> None:
+        values = {"status": status, "worker_id": None, "lease_expires_at": None}
+        if error is not None:
+            values["last_error"] = error
+        if status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            values["completed_at"] = datetime.utcnow()
+        if retry_at is not None:
+            values["available_at"] = retry_at
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(TaskJob).where(TaskJob.id == job_id).values(**values))
+            await db.commit()
+
+
+# worker_id 每個程序唯一（同一主機上的多個 uvicorn worker 不會互相回收任務）
+job_queue = JobQueue(worker_id=f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from src.constants import LINE_EVENT_WORKERS
+from src.services.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+LineEventHandler = Callable[[dict], Awaitable[Any]]
+
+
+class LineEventQueue:
+    """
+    LINE webhook 事件佇列
+
+    Webhook 驗證簽名並將任務寫入持久化佇列後，把事件放入此佇列就回應 200；
+    由背景 worker 並行送出回覆確認與管理員通知。這裡只處理這些通知：事件只存在
+    記憶體中，程序在處理前結束時會少一則回覆（reply token 本身也只在短時間內有效），
+    任務本身不會遺失。
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._handler: Optional[LineEventHandler] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.webhook_latency = LatencyHistogram()
+        self.event_latency = LatencyHistogram()
+
+    def register(self, handler: LineEventHandler) -> None:
+        """註冊事件處理函數，handler 以 LINE event dict 呼叫"""
+        self._handler = handler
+
+    def submit(self, event: dict, received_at: float) -> None:
+        """放入事件（received_at 為 time.perf_counter()，用於計算處理延遲）"""
+        self._queue.put_nowait((event, received_at))
+
+    def observe_webhook(self, received_at: float) -> None:
+        """記錄 webhook 從收到請求到回應的時間"""
+        self.webhook_latency.observe((time.perf_counter() - received_at) * 1000)
+
+    # ==================== 生命週期 ====================
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """處理完已收到的事件後停止 worker"""
+        if self._tasks:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            event, received_at = await self._queue.get()
+            try:
+                await self._handler(event)
+            except Exception as e:
+                logger.error(f"LINE event handling failed: {e}", exc_info=True)
+            finally:
+                self.event_latency.observe((time.perf_counter() - received_at) * 1000)
+                self._queue.task_done()
+
+    # ==================== 狀態查詢 ====================
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "workers": len(self._tasks),
+            "webhook_latency": self.webhook_latency.snapshot(),
+            "event_latency": self.event_latency.snapshot(),
+        }
+
+
+line_event_queue = LineEventQueue(workers=LINE_EVENT_WORKERS)
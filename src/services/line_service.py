@@ -1,11 +1,13 @@
 import asyncio
 import logging
+from dataclasses import dataclass, field
+from typing import Optional
 
 from linebot.v3 import WebhookHandler
 from linebot.v3.messaging import (
     Configuration,
-    ApiClient,
-    MessagingApi,
+    AsyncApiClient,
+    AsyncMessagingApi,
     ReplyMessageRequest,
     PushMessageRequest,
     TextMessage,
@@ -14,10 +16,36 @@ from linebot.v3.exceptions import InvalidSignatureError
 from linebot.v3.webhooks import MessageEvent, TextMessageContent
 
 from src.config import settings
+from src.constants import (
+    LINE_MAX_MESSAGES_PER_REQUEST,
+    LINE_MAX_TEXT_LENGTH,
+    LINE_PUSH_BATCH_WINDOW_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def split_text(text: str, limit: int = LINE_MAX_TEXT_LENGTH) -> list[str]:
+    """將超過 LINE 長度限制的文字分段，盡量在換行處切開"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+@dataclass
+class _OutgoingMessage:
+    """等待合併推送的訊息（已分段）"""
+    texts: list[str]
+    future: asyncio.Future = field(repr=False)
+
+
 class LineService:
     """LINE Messaging API 服務"""
     def __init__(self):
@@ -25,7 +53,33 @@ class LineService:
         self.configuration = Configuration(
             access_token=settings.line_channel_access_token
         )
+        self.configuration.connection_pool_maxsize = settings.line_max_connections
         self.joey_user_id = settings.joey_line_user_id
+        self._api_client: Optional[AsyncApiClient] = None
+        self._messaging_api: Optional[AsyncMessagingApi] = None
+
+        # 推送佇列：收件人 → 等待送出的訊息（依加入順序）
+        self._outbox: dict[str, list[_OutgoingMessage]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def _api(self) -> AsyncMessagingApi:
+        """
+        Long-lived AsyncMessagingApi; connections are pooled and kept alive.
+        Created on first use because the aiohttp session must belong to the running loop.
+        """
+        if self._messaging_api is None:
+            self._api_client = AsyncApiClient(self.configuration)
+            self._messaging_api = AsyncMessagingApi(self._api_client)
+        return self._messaging_api
+
+    async def aclose(self) -> None:
+        """送出佇列中的訊息並關閉連線池（於 lifespan 結束時呼叫）"""
+        await self.flush()
+        if self._api_client is not None:
+            await self._api_client.close()
+            self._api_client = None
+            self._messaging_api = None
 
     def verify_signature(self, body: str, signature: str) -> bool:
         """Verify LINE webhook signature."""
@@ -36,45 +90,84 @@ class LineService:
             logger.warning("LINE 簽名驗證失敗")
             return False
 
-    def _sync_reply_message(self, reply_token: str, message: str) -> None:
-        """同步回覆 LINE 訊息（內部使用）"""
-        with ApiClient(self.configuration) as api_client:
-            api = MessagingApi(api_client)
-            api.reply_message(
+    async def reply_message(self, reply_token: str, message: str) -> None:
+        """Reply to a LINE message (long text is split; a reply carries at most 5 messages)."""
+        try:
+            chunks = split_text(message)
+            if len(chunks) > LINE_MAX_MESSAGES_PER_REQUEST:
+                logger.warning(f"LINE 回覆超過 {LINE_MAX_MESSAGES_PER_REQUEST} 段，多餘部分捨棄")
+            await self._api().reply_message(
                 ReplyMessageRequest(
                     reply_token=reply_token,
-                    messages=[TextMessage(text=message)]
+                    messages=[TextMessage(text=chunk) for chunk in chunks[:LINE_MAX_MESSAGES_PER_REQUEST]]
                 )
             )
-
-    async def reply_message(self, reply_token: str, message: str) -> None:
-        """Reply to a LINE message."""
-        try:
-            await asyncio.to_thread(self._sync_reply_message, reply_token, message)
             logger.debug(f"LINE 回覆訊息成功: {message[:50]}...")
         except Exception as e:
             logger.error(f"LINE 回覆訊息失敗: {e}")
             raise
 
-    def _sync_push_message(self, user_id: str, message: str) -> None:
-        """同步推送 LINE 訊息（內部使用）"""
-        with ApiClient(self.configuration) as api_client:
-            api = MessagingApi(api_client)
-            api.push_message(
-                PushMessageRequest(
-                    to=user_id,
-                    messages=[TextMessage(text=message)]
-                )
-            )
-
     async def push_message(self, user_id: str, message: str) -> None:
-        """Push a message to a user."""
+        """
+        Push a message to a user through the outbound queue.
+        Messages to the same recipient within LINE_PUSH_BATCH_WINDOW_SECONDS go out
+        in one multi-message push; returns once the message has been sent.
+        """
+        outgoing = _OutgoingMessage(texts=split_text(message), future=asyncio.get_running_loop().create_future())
+        self._outbox.setdefault(user_id, []).append(outgoing)
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_after_window())
+
+        await outgoing.future
+
+    async def _flush_after_window(self) -> None:
+        # 送出期間加入的訊息由下一輪送出，直到佇列清空才結束
+        while self._outbox:
+            await asyncio.sleep(LINE_PUSH_BATCH_WINDOW_SECONDS)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """立即送出佇列中的所有訊息"""
+        async with self._flush_lock:
+            outbox, self._outbox = self._outbox, {}
+            await asyncio.gather(*(
+                self._send(user_id, outgoing) for user_id, outgoing in outbox.items()
+            ))
+
+    async def _send(self, user_id: str, outgoing: list[_OutgoingMessage]) -> None:
+        texts = [text for item in outgoing for text in item.texts]
+        # 每則訊息在 texts 中的結束位置；該位置之前都送出後即通知呼叫端
+        ends, end = [], 0
+        for item in outgoing:
+            end += len(item.texts)
+            ends.append(end)
+
+        done = 0
         try:
-            await asyncio.to_thread(self._sync_push_message, user_id, message)
-            logger.debug(f"LINE 推送訊息成功至 {user_id[:8]}...: {message[:50]}...")
+            # 每次請求最多 5 則訊息，依序送出以維持順序
+            for start in range(0, len(texts), LINE_MAX_MESSAGES_PER_REQUEST):
+                messages = [TextMessage(text=text) for text in texts[start:start + LINE_MAX_MESSAGES_PER_REQUEST]]
+                await self._api().push_message(PushMessageRequest(to=user_id, messages=messages))
+                sent = start + len(messages)
+                while done < len(outgoing) and ends[done] <= sent:
+                    self._resolve(outgoing[done])
+                    done += 1
+            logger.debug(f"LINE 推送成功，{len(texts)} 則訊息: {texts[0][:50]}...")
         except Exception as e:
+            # 只有尚未完整送出的訊息視為失敗
             logger.error(f"LINE 推送訊息失敗至 {user_id[:8]}...: {e}")
-            raise
+            for item in outgoing[done:]:
+                self._resolve(item, e)
+
+    @staticmethod
+    def _resolve(item: _OutgoingMessage, error: Optional[Exception] = None) -> None:
+        if item.future.done():
+            return
+        if error is None:
+            item.future.set_result(None)
+        else:
+            item.future.set_exception(error)
 
     async def push_to_joey(self, message: str) -> None:
         """Push a message to Joey."""
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from src.constants import MEMORY_BM25_B, MEMORY_BM25_K1, MEMORY_INDEX_VERSION
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+_CJK_RE = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+
+
+def tokenize(text: str) -> list[str]:
+    """英數字以單字切分；中文沒有空白分詞，改用字元 bigram（單字詞保留單字）"""
+    tokens = []
+    for run in _WORD_RE.findall(text.lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓字元約 1 token，其餘約 4 字元 1 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def memories_signature(memories: list[dict]) -> str:
+    """記憶內容的簽章，用於判斷索引是否需要重建"""
+    digest = hashlib.sha1(str(MEMORY_INDEX_VERSION).encode())
+    for mem in memories:
+        for key in ("id", "title", "category", "importance", "content"):
+            digest.update(str(mem.get(key) or "").encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class _IndexData(NamedTuple):
+    """索引內容；整組一次替換，查詢時不會讀到新舊混合的狀態"""
+    signature: Optional[str]
+    postings: dict[str, dict[str, int]]
+    doc_lengths: dict[str, int]
+    avg_length: float
+
+
+_EMPTY_INDEX = _IndexData(None, {}, {}, 0.0)
+
+
+class MemoryIndex:
+    """
+    記憶的 BM25 倒排索引
+
+    以標題、分類與內容建立索引（標題權重加倍），索引可寫入 JSON 檔，
+    重啟後記憶未變動時直接載入，不必重新分詞。
+
+    ensure() 在執行緒中執行（以鎖序列化），search() 在事件迴圈上讀取：
+    新索引先建立在區域變數中，完成後以單一賦值替換 self._data。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._data = _EMPTY_INDEX
+        self._lock = threading.Lock()
+
+    @property
+    def signature(self) -> Optional[str]:
+        return self._data.signature
+
+    # ==================== 建立與持久化 ====================
+
+    def ensure(self, memories: list[dict]) -> None:
+        """確保索引對應目前的記憶：簽章相同則沿用，其次嘗試載入檔案，最後重建"""
+        signature = memories_signature(memories)
+        with self._lock:
+            if signature == self._data.signature:
+                return
+            data = self._load(signature)
+            if data:
+                self._data = data
+                logger.debug(f"載入記憶索引: {len(data.doc_lengths)} 筆")
+                return
+
+            data = self._build(memories, signature)
+            self._data = data
+            self._save(data)
+            logger.debug(f"重建記憶索引: {len(data.doc_lengths)} 筆, {len(data.postings)} 個詞")
+
+    @staticmethod
+    def _build(memories: list[dict], signature: str) -> _IndexData:
+        postings: dict[str, dict[str, int]] = {}
+        doc_lengths = {}
+        for mem in memories:
+            text = f"{mem.get('title') or ''} {mem.get('title') or ''} {mem.get('category') or ''} {mem.get('content') or ''}"
+            counts = Counter(tokenize(text))
+            doc_lengths[mem["id"]] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, {})[mem["id"]] = tf
+
+        avg_length = sum(doc_lengths.values()) / len(doc_lengths) if doc_lengths else 0.0
+        return _IndexData(signature, postings, doc_lengths, avg_length)
+
+    def _load(self, signature: str) -> Optional[_IndexData]:
+        if not self.path or not self.path.exists():
+            return None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"讀取記憶索引失敗: {e}")
+            return None
+        if data.get("signature") != signature:
+            return None
+
+        return _IndexData(signature, data["postings"], data["doc_lengths"], data["avg_length"])
+
+    def _save(self, data: _IndexData) -> None:
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({
+                "signature": data.signature,
+                "postings": data.postings,
+                "doc_lengths": data.doc_lengths,
+                "avg_length": data.avg_length,
+            }, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning(f"寫入記憶索引失敗: {e}")
+
+    # ==================== 查詢 ====================
+
+    def search(self, query: str, limit: Optional[int] = None) -> list[tuple[str, float]]:
+        """回傳 (memory id, BM25 分數)，依分數由高到低；不含分數為 0 的記憶"""
+        data = self._data
+        total = len(data.doc_lengths)
+        if not total:
+            return []
+
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = data.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = 1 - MEMORY_BM25_B + MEMORY_BM25_B * data.doc_lengths[doc_id] / (data.avg_length or 1)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (MEMORY_BM25_K1 + 1) / (tf + MEMORY_BM25_K1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,45 @@
+import bisect
+from typing import Optional
+
+from src.constants import LATENCY_BUCKETS_MS
+
+
+class LatencyHistogram:
+    """固定區間的延遲直方圖（毫秒），用於觀察 p50/p95 而不保存每筆樣本"""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self._count += 1
+        self._sum += value_ms
+        self._max = max(self._max, value_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """以所在區間的上界估計分位數"""
+        if not self._count:
+            return None
+        target = q * self._count
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self._max
+        return self._max
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound:g}" for bound in self.buckets] + [f">{self.buckets[-1]:g}"]
+        return {
+            "count": self._count,
+            "mean_ms": round(self._sum / self._count, 2) if self._count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self._max, 2),
+            "buckets": dict(zip(labels, self._counts)),
+        }
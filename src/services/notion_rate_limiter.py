@@ -0,0 +1,189 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from src.constants import (
+    NOTION_PRIORITY_DEFAULT,
+    NOTION_RETRY_BASE_DELAY_SECONDS,
+    NOTION_RETRY_MAX_ATTEMPTS,
+    NOTION_RETRY_MAX_DELAY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# 可重試的 HTTP 狀態碼（429 另外依 Retry-After 處理）
+RETRYABLE_STATUSES = {409, 500, 502, 503, 504}
+
+# 請求尚未送出即失敗的錯誤（連線失敗、等待連線池逾時），非冪等請求也可安全重試
+PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class NotionRequestScheduler:
+    """
+    Notion API 請求排程器
+
+    以 token bucket 控制每秒請求數（Notion 平均約 3 req/s），等待中的請求
+    依優先權（數字越小越優先）與提交順序取得 token。429 會依 Retry-After
+    暫停所有請求；409/5xx 與逾時以帶 jitter 的指數退避重試。
+    非冪等請求（idempotent=False，例如建立頁面）可能已在伺服器端生效，
+    只重試 429 與請求送出前的連線錯誤，避免重複建立。
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self._in_flight = 0
+        self._counters = {"requests": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    # ==================== 提交 ====================
+
+    async def run(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        priority: int = NOTION_PRIORITY_DEFAULT,
+        idempotent: bool = True,
+        **kwargs
+    ) -> Any:
+        """排隊取得 token 後執行 func，必要時重試"""
+        seq = next(self._seq)
+        attempt = 1
+        while True:
+            await self._acquire(priority, seq)
+            self._in_flight += 1
+            self._counters["requests"] += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None or attempt >= NOTION_RETRY_MAX_ATTEMPTS:
+                    self._counters["failed"] += 1
+                    raise
+                logger.warning(
+                    f"Notion request failed ({e}), retrying in {delay:.1f}s "
+                    f"(attempt {attempt}/{NOTION_RETRY_MAX_ATTEMPTS})"
+                )
+                self._counters["retries"] += 1
+                attempt += 1
+            finally:
+                self._in_flight -= 1
+
+            # 重試時沿用原本的 seq，排在同優先權較晚提交的請求之前
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool = True) -> Optional[float]:
+        """回傳重試前的等待秒數；不可重試時回傳 None"""
+        if isinstance(error, HTTPResponseError) and error.status == 429:
+            self._counters["rate_limited"] += 1
+            delay = self._retry_after(error) or self._backoff(attempt)
+            self.pause(delay)
+            return delay
+        if not idempotent:
+            # notion_client 將 httpx 逾時轉為 RequestTimeoutError，原本的例外保留在 __context__
+            cause = error.__context__ if isinstance(error, RequestTimeoutError) else error
+            return self._backoff(attempt) if isinstance(cause, PRE_SEND_ERRORS) else None
+        if isinstance(error, HTTPResponseError) and error.status in RETRYABLE_STATUSES:
+            return self._backoff(attempt)
+        if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+            return self._backoff(attempt)
+        return None
+
+    @staticmethod
+    def _retry_after(error: HTTPResponseError) -> Optional[float]:
+        try:
+            return float(error.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """指數退避加 jitter：介於上限的一半到上限之間"""
+        ceiling = min(NOTION_RETRY_MAX_DELAY_SECONDS, NOTION_RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def pause(self, seconds: float) -> None:
+        """暫停發送請求（收到 429 時所有請求一起等待）"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        logger.warning(f"Notion rate limited, pausing requests for {seconds:.1f}s")
+
+    # ==================== Token bucket ====================
+
+    async def _acquire(self, priority: int, seq: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, seq, future))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        await future
+
+    def _ensure_dispatcher(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now < self._paused_until:
+            self._updated_at = now
+            return
+        elapsed = now - max(self._updated_at, self._paused_until)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            # 移除已取消的等待者
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            self._refill()
+            wait = self._paused_until - time.monotonic()
+            if wait <= 0 and self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+            if wait > 0:
+                # 等待期間若有更高優先權的請求加入，下一輪仍會先取出它
+                await asyncio.sleep(wait)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+    # ==================== 狀態查詢 ====================
+
+    def stats(self) -> dict:
+        """佇列深度（依優先權）與累計請求數"""
+        queued: dict[int, int] = {}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[priority] = queued.get(priority, 0) + 1
+        return {
+            "queued": sum(queued.values()),
+            "queued_by_priority": dict(sorted(queued.items())),
+            "in_flight": self._in_flight,
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            **self._counters,
+        }
@@ -1,12 +1,31 @@
 import asyncio
+import importlib.util
 import logging
-from datetime import datetime
-from functools import partial
-from typing import Any, Callable, Optional
-from notion_client import Client
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from notion_client import AsyncClient
+from sqlalchemy import delete, select
 
 from src.config import settings
-from src.constants import NOTION_MAX_TEXT_LENGTH
+from src.constants import (
+    MEMORY_IMPORTANCE_ORDER,
+    NOTION_KEEPALIVE_EXPIRY_SECONDS,
+    NOTION_LAST_EDITED_SKEW_SECONDS,
+    NOTION_MAX_TEXT_LENGTH,
+    NOTION_MEMORY_FULL_SYNC_INTERVAL_SECONDS,
+    NOTION_PAGE_SIZE,
+    NOTION_PRIORITY_DEFAULT,
+    NOTION_PRIORITY_MEMORY,
+    NOTION_PRIORITY_STATUS,
+)
+from src.database.models import NotionMemory
+from src.database.session import AsyncSessionLocal
+from src.services.memory_index import MemoryIndex, estimate_tokens
+from src.services.notion_rate_limiter import NotionRequestScheduler
+from src.services.notion_write_behind import NotionWriteBehind, PageRef, PendingPage
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +34,65 @@ class NotionService:
     """Notion 資料庫操作服務"""
 
     def __init__(self):
-        self.client = Client(auth=settings.notion_api_key)
+        self.client = AsyncClient(auth=settings.notion_api_key, client=self._create_http_client())
+        self.requests = NotionRequestScheduler(
+            rate=settings.notion_requests_per_second,
+            burst=settings.notion_request_burst
+        )
+        self.writes = NotionWriteBehind(self._send_page_update)
         self.inbox_db_id = settings.notion_inbox_db_id
         self.review_db_id = settings.notion_review_db_id
         self.memory_db_id = settings.notion_memory_db_id
         self.evolution_db_id = settings.notion_evolution_db_id
 
-    # ==================== 非同步執行輔助方法 ====================
+        # Memory 快取（read-through，TTL + 寫入時失效）
+        self.memory_cache_ttl = settings.notion_memory_cache_ttl_seconds
+        self.memory_cache_persist = settings.notion_memory_cache_persist
+        self._memory_cache: Optional[list[dict]] = None
+        self._memory_title_index: dict[str, str] = {}
+        self._memory_cache_at = 0.0
+        self._memory_synced_at: Optional[datetime] = None
+        self._memory_full_sync_at: Optional[datetime] = None
+        self._formatted_memories: Optional[str] = None
+        self._memory_cache_lock = asyncio.Lock()
+
+        # Memory 檢索（BM25 索引，只將相關記憶放入 prompt）
+        self.memory_top_k = settings.memory_retrieval_top_k
+        self.memory_token_budget = settings.memory_prompt_token_budget
+        self.memory_index = MemoryIndex(settings.memory_index_path or None)
+
+    # ==================== HTTP 連線 ====================
+
+    @staticmethod
+    def _create_http_client() -> httpx.AsyncClient:
+        """
+        Shared keep-alive pool for all Notion requests.
+        HTTP/2 is used when the h2 package is installed.
+        """
+        http2 = settings.notion_http2 and importlib.util.find_spec("h2") is not None
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.notion_max_connections,
+                max_keepalive_connections=settings.notion_max_connections,
+                keepalive_expiry=NOTION_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+
+    async def aclose(self) -> None:
+        """關閉連線池（於 lifespan 結束時呼叫）"""
+        await self.client.aclose()
 
-    async def _run_sync(self, func: Callable[..., Any], *args, **kwargs) -> Any:
-        """將同步函數包裝為非同步執行，避免阻塞事件循環"""
-        return await asyncio.to_thread(partial(func, *args, **kwargs))
+    async def _request(
+        self,
+        method: Callable[..., Awaitable[Any]],
+        priority: int = NOTION_PRIORITY_DEFAULT,
+        **kwargs
+    ) -> Any:
+        """透過請求排程器呼叫 Notion API（限速、重試、優先權）"""
+        # 建立頁面不是冪等操作：回應遺失時重試會產生重複頁面
+        idempotent = method != self.client.pages.create
+        return await self.requests.run(method, priority=priority, idempotent=idempotent, **kwargs)
 
     # ==================== Property 建構輔助方法 ====================
 
@@ -109,7 +176,7 @@ class NotionService:
         """Create a new task in Inbox database. Returns the page ID."""
         logger.info(f"建立 Inbox 任務: {title}")
         try:
-            response = await self._run_sync(
+            response = await self._request(
                 self.client.pages.create,
                 parent={"database_id": self.inbox_db_id},
                 properties={
@@ -130,10 +197,11 @@ class NotionService:
         """Update the status of an Inbox task."""
         logger.debug(f"更新 Inbox 狀態: {page_id[:8]}... -> {status}")
         try:
-            await self._run_sync(
+            await self._request(
                 self.client.pages.update,
                 page_id=page_id,
-                properties={"Status": self._build_select(status)}
+                properties={"Status": self._build_select(status)},
+                priority=NOTION_PRIORITY_STATUS
             )
         except Exception as e:
             logger.error(f"更新 Inbox 狀態失敗: {e}", exc_info=True)
@@ -143,7 +211,7 @@ class NotionService:
         """Archive (delete) an Inbox task."""
         logger.debug(f"刪除 Inbox 任務: {page_id[:8]}...")
         try:
-            await self._run_sync(
+            await self._request(
                 self.client.pages.update,
                 page_id=page_id,
                 archived=True
@@ -164,7 +232,7 @@ class NotionService:
         """Create a simple review task with direct result."""
         logger.info(f"建立簡單 Review 任務: {title}")
         try:
-            response = await self._run_sync(
+            response = await self._request(
                 self.client.pages.create,
                 parent={"database_id": self.review_db_id},
                 properties={
@@ -197,7 +265,7 @@ class NotionService:
         """Create a complex review task with analysis and prompt for Claude Code."""
         logger.info(f"建立複雜 Review 任務: {title}")
         try:
-            response = await self._run_sync(
+            response = await self._request(
                 self.client.pages.create,
                 parent={"database_id": self.review_db_id},
                 properties={
@@ -222,10 +290,11 @@ class NotionService:
 
     async def update_review_task_status(self, page_id: str, status: str) -> None:
         """Update the status of a Review task."""
-        await self._run_sync(
+        await self._request(
             self.client.pages.update,
             page_id=page_id,
-            properties={"Status": self._build_select(status)}
+            properties={"Status": self._build_select(status)},
+            priority=NOTION_PRIORITY_STATUS
         )
 
     async def update_review_task_result(
@@ -236,6 +305,19 @@ class NotionService:
         folder_path: Optional[str] = None
     ) -> None:
         """Update a Review task with execution result."""
+        await self._request(
+            self.client.pages.update,
+            page_id=page_id,
+            properties=self._review_result_properties(status, result, folder_path),
+            priority=NOTION_PRIORITY_STATUS
+        )
+
+    def _review_result_properties(
+        self,
+        status: str,
+        result: str,
+        folder_path: Optional[str] = None
+    ) -> dict:
         properties = {
             "Status": self._build_select(status),
             "Result": self._build_rich_text(result),
@@ -245,48 +327,345 @@ class NotionService:
         if folder_path:
             properties["Folder"] = self._build_rich_text(folder_path, truncate=False)
 
-        await self._run_sync(self.client.pages.update, page_id=page_id, properties=properties)
+        return properties
 
-    # ==================== Memory CRUD ====================
+    # ==================== Write-behind ====================
+    # 不等待 Notion 回應的寫入：同一頁面的連續更新合併為一次送出
 
-    async def get_all_memories(self) -> list[dict]:
-        """Fetch all memories from the Memory database."""
-        response = await self._run_sync(
-            self.client.databases.query,
-            database_id=self.memory_db_id,
-            sorts=[
-                {"property": "Importance", "direction": "ascending"},
-                {"property": "UpdatedAt", "direction": "descending"}
-            ]
+    def defer_create(self, create: Awaitable[str], name: str = "") -> PendingPage:
+        """在背景建立頁面（例如 create_inbox_task(...)），立即回傳 PendingPage"""
+        return PendingPage(create, name=name)
+
+    def defer_inbox_status(self, page: PageRef, status: str) -> None:
+        self.writes.update(page, {"Status": self._build_select(status)}, priority=NOTION_PRIORITY_STATUS)
+
+    def defer_inbox_delete(self, page: PageRef) -> None:
+        self.writes.update(page, archived=True)
+
+    def defer_review_status(self, page: PageRef, status: str) -> None:
+        self.writes.update(page, {"Status": self._build_select(status)}, priority=NOTION_PRIORITY_STATUS)
+
+    def defer_review_result(
+        self,
+        page: PageRef,
+        status: str,
+        result: str,
+        folder_path: Optional[str] = None
+    ) -> None:
+        self.writes.update(
+            page,
+            self._review_result_properties(status, result, folder_path),
+            priority=NOTION_PRIORITY_STATUS
         )
 
+    async def flush_writes(self, *pages: Optional[PageRef]) -> None:
+        """等待指定頁面的背景建立與更新完成"""
+        await self.writes.flush(*pages)
+
+    async def _send_page_update(
+        self,
+        page_id: str,
+        properties: dict,
+        archived: Optional[bool],
+        priority: int
+    ) -> None:
+        kwargs = {"properties": properties} if properties else {}
+        if archived is not None:
+            kwargs["archived"] = archived
+        logger.debug(f"送出合併的頁面更新: {page_id[:8]}... {list(properties)} archived={archived}")
+        await self._request(self.client.pages.update, page_id=page_id, priority=priority, **kwargs)
+
+    # ==================== Memory CRUD ====================
+
+    def _parse_memory_page(self, page: dict) -> dict:
+        """Parse a Notion page into a memory dict."""
+        props = page["properties"]
+        return {
+            "id": page["id"],
+            "title": self._parse_title(props, "Name"),
+            "category": self._parse_select(props, "Category"),
+            "content": self._parse_rich_text(props, "Content"),
+            "importance": self._parse_select(props, "Importance", default="medium"),
+            "updated_at": self._parse_date(props, "UpdatedAt"),
+            "last_edited_time": page.get("last_edited_time"),
+        }
+
+    async def _query_memories(self, filter: Optional[dict] = None) -> list[dict]:
+        """
+        Query the Memory database, split into one partition per Importance value.
+        Within a partition each request needs the previous page's cursor, so its pages are
+        fetched in order; the partitions are fetched concurrently and concatenated in
+        importance order (same ordering as sorting the whole database by Importance).
+        """
+        partitions = await asyncio.gather(*(
+            self._query_memory_partition(
+                [filter, *conditions] if filter else conditions
+            )
+            for conditions in self._memory_importance_partitions()
+        ))
+        return [memory for partition in partitions for memory in partition]
+
+    @staticmethod
+    def _memory_importance_partitions() -> list[list[dict]]:
+        """Importance filters covering every page: each known value, any other value, then empty."""
+        def importance(condition: dict) -> dict:
+            return {"property": "Importance", "select": condition}
+
+        return [
+            *([importance({"equals": value})] for value in MEMORY_IMPORTANCE_ORDER),
+            [importance({"does_not_equal": value}) for value in MEMORY_IMPORTANCE_ORDER] + [importance({"is_not_empty": True})],
+            [importance({"is_empty": True})],
+        ]
+
+    async def _query_memory_partition(self, conditions: list[dict]) -> list[dict]:
+        """Read every page matching all conditions, following next_cursor."""
+        query = {
+            "database_id": self.memory_db_id,
+            "filter": conditions[0] if len(conditions) == 1 else {"and": conditions},
+            "sorts": [{"property": "UpdatedAt", "direction": "descending"}],
+            "page_size": NOTION_PAGE_SIZE,
+        }
+
         memories = []
-        for page in response["results"]:
-            props = page["properties"]
-            memories.append({
-                "id": page["id"],
-                "title": self._parse_title(props, "Name"),
-                "category": self._parse_select(props, "Category"),
-                "content": self._parse_rich_text(props, "Content"),
-                "importance": self._parse_select(props, "Importance", default="medium"),
-            })
+        cursor = None
+        while True:
+            if cursor:
+                query["start_cursor"] = cursor
+            response = await self._request(self.client.databases.query, **query)
+            memories.extend(self._parse_memory_page(page) for page in response["results"])
+
+            cursor = response.get("next_cursor")
+            if not (response.get("has_more") and cursor):
+                break
 
         return memories
 
+    async def get_all_memories(self, force_refresh: bool = False) -> list[dict]:
+        """
+        Fetch all memories, served from the local cache while it is fresh.
+        Expired caches are refreshed incrementally (pages edited since the last sync);
+        force_refresh or NOTION_MEMORY_FULL_SYNC_INTERVAL_SECONDS triggers a full reload.
+        """
+        if not force_refresh and self._memory_cache_valid():
+            return list(self._memory_cache)
+
+        async with self._memory_cache_lock:
+            # 等待鎖的期間可能已由其他請求更新
+            if not force_refresh and self._memory_cache_valid():
+                return list(self._memory_cache)
+
+            if not force_refresh and self._memory_cache is None and self.memory_cache_persist:
+                if await self._load_persisted_memories() and self._memory_cache_valid():
+                    logger.debug(f"從本地資料庫載入 {len(self._memory_cache)} 筆記憶快取")
+                    return list(self._memory_cache)
+
+            await self._sync_memories(full=force_refresh)
+            return list(self._memory_cache)
+
     async def format_memories_for_prompt(self) -> str:
-        """Format memories as a string for Claude prompt."""
+        """Format memories as a string for Claude prompt (reused until memories change)."""
         memories = await self.get_all_memories()
+        if self._formatted_memories is not None:
+            return self._formatted_memories
 
         if not memories:
-            return "目前沒有儲存的記憶。"
+            formatted_prompt = "目前沒有儲存的記憶。"
+        else:
+            formatted_prompt = "\n\n".join(self._format_memory(mem) for mem in memories)
+
+        self._formatted_memories = formatted_prompt
+        return formatted_prompt
+
+    async def select_memories_for_prompt(self, user_input: str) -> tuple[str, str]:
+        """
+        Pick memories for the Stage 1 prompt instead of injecting all of them.
+        Returns (pinned, relevant): every high-importance memory, plus the BM25 top-k
+        of the others for this input, filling what is left of the token budget.
+        """
+        if self.memory_top_k <= 0:
+            return await self.format_memories_for_prompt(), ""
 
-        formatted = []
-        for mem in memories:
-            formatted.append(
-                f"【{mem['title']}】({mem['category']}, {mem['importance']})\n{mem['content']}"
-            )
+        memories = await self.get_all_memories()
+        if not memories:
+            return "目前沒有儲存的記憶。", ""
+
+        pinned = [mem for mem in memories if mem["importance"] == "high"]
+        pinned_text = "\n\n".join(self._format_memory(mem) for mem in pinned) or "目前沒有標記為重要的記憶。"
+        remaining = self.memory_token_budget - estimate_tokens(pinned_text)
+        if remaining < 0:
+            logger.warning(f"重要記憶已超過 token 預算 ({self.memory_token_budget})，不再加入相關記憶")
+
+        await asyncio.to_thread(self.memory_index.ensure, memories)
+        by_id = {mem["id"]: mem for mem in memories}
+        selected = []
+        for memory_id, _ in self.memory_index.search(user_input):
+            if len(selected) >= self.memory_top_k or remaining <= 0:
+                break
+            mem = by_id.get(memory_id)
+            if mem is None or mem["importance"] == "high":
+                continue
+            text = self._format_memory(mem)
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                continue
+            selected.append(text)
+            remaining -= cost
+
+        logger.info(f"選取記憶: 重要 {len(pinned)} 筆 + 相關 {len(selected)} 筆 / 共 {len(memories)} 筆")
+        return pinned_text, "\n\n".join(selected)
+
+    @staticmethod
+    def _format_memory(mem: dict) -> str:
+        return f"【{mem['title']}】({mem['category']}, {mem['importance']})\n{mem['content']}"
+
+    # ==================== Memory 快取 ====================
+
+    def _memory_cache_valid(self) -> bool:
+        return (
+            self._memory_cache is not None
+            and time.monotonic() - self._memory_cache_at < self.memory_cache_ttl
+        )
+
+    def _set_memory_cache(self, memories: list[dict], cached_at: Optional[float] = None) -> None:
+        self._memory_cache = memories
+        self._memory_cache_at = time.monotonic() if cached_at is None else cached_at
+        self._formatted_memories = None
+        self._rebuild_memory_title_index()
+
+    def _rebuild_memory_title_index(self) -> None:
+        # 同名記憶以排序較前者為準（與 Notion 查詢結果的第一筆一致）
+        self._memory_title_index = {}
+        for mem in self._memory_cache or []:
+            self._memory_title_index.setdefault(mem["title"], mem["id"])
+
+    def _apply_cached_memory_write(self, page_id: str, changes: dict) -> None:
+        """
+        Reflect a successful create/update in the cached memories and title index
+        right away; the next read still syncs with Notion.
+        """
+        if self._memory_cache is not None:
+            existing = next((mem for mem in self._memory_cache if mem["id"] == page_id), None)
+            if existing is not None:
+                entry = {**existing, **changes}
+            else:
+                entry = {"id": page_id, "title": "", "category": None, "content": "",
+                         "importance": "medium", "last_edited_time": None, **changes}
+            self._memory_cache = self._merge_memories(self._memory_cache, [entry])
+            self._rebuild_memory_title_index()
+        self._mark_memories_stale()
+
+    def invalidate_memory_cache(self) -> None:
+        """Drop cached memories; the next read does a full reload from Notion."""
+        self._memory_cache = None
+        self._memory_title_index = {}
+        self._memory_cache_at = 0.0
+        self._memory_synced_at = None
+        self._memory_full_sync_at = None
+        self._formatted_memories = None
+
+    def _mark_memories_stale(self) -> None:
+        """Expire the cache but keep its contents, so the next read syncs incrementally."""
+        self._memory_cache_at = 0.0
+        self._formatted_memories = None
+
+    async def _sync_memories(self, full: bool = False) -> None:
+        """Refresh the cache from Notion (full reload or pages edited since the last sync)."""
+        started = datetime.utcnow()
+        needs_full = (
+            full
+            or self._memory_cache is None
+            or self._memory_synced_at is None
+            or self._memory_full_sync_at is None
+            or (started - self._memory_full_sync_at).total_seconds() > NOTION_MEMORY_FULL_SYNC_INTERVAL_SECONDS
+        )
+
+        if needs_full:
+            memories = await self._query_memories()
+            self._memory_full_sync_at = started
+            logger.debug(f"記憶完整同步: {len(memories)} 筆")
+        else:
+            since = self._memory_synced_at - timedelta(seconds=NOTION_LAST_EDITED_SKEW_SECONDS)
+            changed = await self._query_memories(filter={
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": since.replace(tzinfo=timezone.utc).isoformat()}
+            })
+            memories = self._merge_memories(self._memory_cache, changed)
+            logger.debug(f"記憶增量同步: {len(changed)} 筆變更，共 {len(memories)} 筆")
+
+        self._set_memory_cache(memories)
+        self._memory_synced_at = started
 
-        return "\n\n".join(formatted)
+        if self.memory_cache_persist:
+            await self._persist_memories(memories, started)
+
+    @staticmethod
+    def _merge_memories(existing: list[dict], changed: list[dict]) -> list[dict]:
+        """Merge changed memories into the cached list and restore the query ordering."""
+        by_id = {mem["id"]: mem for mem in existing}
+        for mem in changed:
+            by_id[mem["id"]] = mem
+
+        rank = {importance: i for i, importance in enumerate(MEMORY_IMPORTANCE_ORDER)}
+        merged = sorted(by_id.values(), key=lambda mem: mem.get("updated_at") or "", reverse=True)
+        merged.sort(key=lambda mem: rank.get(mem.get("importance"), len(rank)))
+        return merged
+
+    async def _load_persisted_memories(self) -> bool:
+        """Load the persisted cache into memory; returns True if anything was loaded."""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(NotionMemory).order_by(NotionMemory.position))
+                rows = result.scalars().all()
+        except Exception as e:
+            logger.warning(f"讀取本地記憶快取失敗: {e}")
+            return False
+
+        if not rows:
+            return False
+
+        # 將資料庫中的同步時間換算成 monotonic 時間，沿用同一套 TTL 判斷
+        synced_at = min(row.synced_at for row in rows)
+        age = (datetime.utcnow() - synced_at).total_seconds()
+        memories = [
+            {
+                "id": row.page_id,
+                "title": row.title,
+                "category": row.category,
+                "content": row.content,
+                "importance": row.importance,
+                "updated_at": row.updated_at,
+                "last_edited_time": row.last_edited_time,
+            }
+            for row in rows
+        ]
+        self._set_memory_cache(memories, cached_at=time.monotonic() - age)
+        self._memory_synced_at = synced_at
+        # 重啟前是否有封存的記憶無從得知，下次同步一律完整同步
+        self._memory_full_sync_at = None
+        return True
+
+    async def _persist_memories(self, memories: list[dict], synced_at: datetime) -> None:
+        """Replace the persisted cache with the given memories."""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(NotionMemory))
+                db.add_all([
+                    NotionMemory(
+                        page_id=mem["id"],
+                        title=mem["title"],
+                        category=mem["category"],
+                        content=mem["content"],
+                        importance=mem["importance"],
+                        updated_at=mem.get("updated_at"),
+                        last_edited_time=mem.get("last_edited_time"),
+                        position=position,
+                        synced_at=synced_at
+                    )
+                    for position, mem in enumerate(memories)
+                ])
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"寫入本地記憶快取失敗: {e}")
 
     async def update_memory(
         self,
@@ -295,15 +674,25 @@ class NotionService:
         importance: Optional[str] = None
     ) -> None:
         """Update an existing memory."""
-        properties = {"UpdatedAt": self._build_date()}
+        updated_at = self._build_date()
+        properties = {"UpdatedAt": updated_at}
+        changes = {"updated_at": updated_at["date"]["start"]}
 
         if content is not None:
             properties["Content"] = self._build_rich_text(content)
+            changes["content"] = content[:NOTION_MAX_TEXT_LENGTH]
 
         if importance is not None:
             properties["Importance"] = self._build_select(importance)
+            changes["importance"] = importance
 
-        await self._run_sync(self.client.pages.update, page_id=page_id, properties=properties)
+        await self._request(
+            self.client.pages.update,
+            page_id=page_id,
+            properties=properties,
+            priority=NOTION_PRIORITY_MEMORY
+        )
+        self._apply_cached_memory_write(page_id, changes)
 
     async def create_memory(
         self,
@@ -314,8 +703,9 @@ class NotionService:
     ) -> str:
         """Create a new memory entry."""
         logger.info(f"建立記憶: {title} ({category}, {importance})")
+        updated_at = self._build_date()
         try:
-            response = await self._run_sync(
+            response = await self._request(
                 self.client.pages.create,
                 parent={"database_id": self.memory_db_id},
                 properties={
@@ -323,37 +713,34 @@ class NotionService:
                     "Category": self._build_select(category),
                     "Content": self._build_rich_text(content),
                     "Importance": self._build_select(importance),
-                    "UpdatedAt": self._build_date(),
-                }
+                    "UpdatedAt": updated_at,
+                },
+                priority=NOTION_PRIORITY_MEMORY
             )
             logger.debug(f"記憶建立成功: {response['id']}")
+            self._apply_cached_memory_write(response["id"], {
+                "title": title,
+                "category": category,
+                "content": content[:NOTION_MAX_TEXT_LENGTH],
+                "importance": importance,
+                "updated_at": updated_at["date"]["start"],
+            })
             return response["id"]
         except Exception as e:
             logger.error(f"建立記憶失敗: {e}", exc_info=True)
             raise
 
-    async def find_memory_by_title(self, title: str) -> Optional[dict]:
-        """Find a memory by title."""
-        response = await self._run_sync(
-            self.client.databases.query,
-            database_id=self.memory_db_id,
-            filter={
-                "property": "Name",
-                "title": {"equals": title}
-            }
-        )
-
-        if response["results"]:
-            page = response["results"][0]
-            props = page["properties"]
-            return {
-                "id": page["id"],
-                "title": self._parse_title(props, "Name"),
-                "category": self._parse_select(props, "Category"),
-                "content": self._parse_rich_text(props, "Content"),
-                "importance": self._parse_select(props, "Importance", default="medium"),
-            }
-        return None
+    async def find_memory_by_title(self, title: str, refresh: bool = True) -> Optional[dict]:
+        """
+        Find a memory by title through the title → page id index of the memory cache.
+        refresh=False skips the cache freshness check (for batches that loaded it already).
+        """
+        if refresh or self._memory_cache is None:
+            await self.get_all_memories()
+        page_id = self._memory_title_index.get(title)
+        if page_id is None:
+            return None
+        return next((dict(mem) for mem in self._memory_cache if mem["id"] == page_id), None)
 
     # ==================== Evolution CRUD ====================
 
@@ -373,7 +760,7 @@ class NotionService:
             raise ValueError("Evolution database ID not configured")
 
         try:
-            response = await self._run_sync(
+            response = await self._request(
                 self.client.pages.create,
                 parent={"database_id": self.evolution_db_id},
                 properties={
@@ -398,7 +785,7 @@ class NotionService:
         if not self.evolution_db_id:
             return []
 
-        response = await self._run_sync(
+        response = await self._request(
             self.client.databases.query,
             database_id=self.evolution_db_id,
             filter={
@@ -418,7 +805,7 @@ class NotionService:
     async def get_evolution_task(self, page_id: str) -> Optional[dict]:
         """Fetch a specific evolution task by ID."""
         try:
-            page = await self._run_sync(self.client.pages.retrieve, page_id=page_id)
+            page = await self._request(self.client.pages.retrieve, page_id=page_id)
             return self._parse_evolution_task(page)
         except Exception as e:
             logger.warning(f"取得進化任務失敗 {page_id[:8]}...: {e}")
@@ -490,14 +877,19 @@ class NotionService:
         if "duration" in kwargs and kwargs["duration"] is not None:
             properties["Duration"] = self._build_number(kwargs["duration"])
 
-        await self._run_sync(self.client.pages.update, page_id=page_id, properties=properties)
+        await self._request(
+            self.client.pages.update,
+            page_id=page_id,
+            properties=properties,
+            priority=NOTION_PRIORITY_STATUS
+        )
 
     async def get_evolution_history(self, limit: int = 20) -> list[dict]:
         """Fetch recent evolution history."""
         if not self.evolution_db_id:
             return []
 
-        response = await self._run_sync(
+        response = await self._request(
             self.client.databases.query,
             database_id=self.evolution_db_id,
             sorts=[
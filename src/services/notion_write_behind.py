@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Union
+
+from src.constants import NOTION_PRIORITY_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+
+class PendingPage:
+    """尚在建立中的 Notion 頁面；可先排入更新，頁面 ID 於建立完成後取得"""
+
+    def __init__(self, create: Awaitable[str], name: str = ""):
+        self.name = name
+        self._task = asyncio.ensure_future(create)
+
+    async def page_id(self) -> str:
+        """等待頁面建立完成並回傳 ID（建立失敗時拋出原本的例外）"""
+        return await asyncio.shield(self._task)
+
+    @property
+    def done(self) -> bool:
+        return self._task.done()
+
+    def __repr__(self) -> str:
+        if self._task.done() and not self._task.cancelled() and self._task.exception() is None:
+            return f"PendingPage({self._task.result()[:8]}...)"
+        return f"PendingPage({self.name or 'creating'})"
+
+
+PageRef = Union[str, PendingPage]
+PageUpdateSender = Callable[[str, dict, Optional[bool], int], Awaitable[None]]
+
+
+@dataclass
+class _PageWrites:
+    """同一頁面尚未送出的更新（後到的屬性值覆蓋先到的）"""
+    properties: dict = field(default_factory=dict)
+    archived: Optional[bool] = None
+    priority: int = NOTION_PRIORITY_DEFAULT
+    worker: Optional[asyncio.Task] = None
+
+    @property
+    def empty(self) -> bool:
+        return not self.properties and self.archived is None
+
+
+class NotionWriteBehind:
+    """
+    Notion 頁面更新的 write-behind 層
+
+    呼叫端排入更新後立即返回。同一頁面在送出前累積的更新合併為一次
+    pages.update；不同頁面的寫入各自以背景 task 並行送出。
+    """
+
+    def __init__(self, send: PageUpdateSender):
+        self._send = send
+        self._pages: dict[object, _PageWrites] = {}
+
+    def update(
+        self,
+        page: PageRef,
+        properties: Optional[dict] = None,
+        archived: Optional[bool] = None,
+        priority: int = NOTION_PRIORITY_DEFAULT
+    ) -> None:
+        """排入頁面更新；page 可為頁面 ID 或 PendingPage"""
+        writes = self._pages.get(page)
+        if writes is None:
+            writes = self._pages[page] = _PageWrites(priority=priority)
+
+        writes.properties.update(properties or {})
+        if archived is not None:
+            writes.archived = archived
+        writes.priority = min(writes.priority, priority)
+
+        if writes.worker is None:
+            writes.worker = asyncio.create_task(self._drain(page, writes))
+
+    async def flush(self, *pages: Optional[PageRef]) -> None:
+        """等待指定頁面（未指定則全部）的建立與更新送出完成，失敗只記錄不拋出"""
+        targets = [page for page in pages if page is not None] if pages else list(self._pages)
+        waits = []
+        for page in targets:
+            if isinstance(page, PendingPage):
+                waits.append(page.page_id())
+            writes = self._pages.get(page)
+            if writes and writes.worker:
+                waits.append(writes.worker)
+
+        for result in await asyncio.gather(*waits, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"Notion write-behind 寫入失敗: {result}")
+
+    def pending(self) -> int:
+        """尚有未送出更新的頁面數"""
+        return len(self._pages)
+
+    async def _drain(self, page: PageRef, writes: _PageWrites) -> None:
+        try:
+            page_id = await page.page_id() if isinstance(page, PendingPage) else page
+
+            # 送出期間到達的更新會累積到下一批
+            while not writes.empty:
+                properties, archived, priority = writes.properties, writes.archived, writes.priority
+                writes.properties, writes.archived = {}, None
+                try:
+                    await self._send(page_id, properties, archived, priority)
+                except Exception as e:
+                    logger.error(f"Notion 頁面更新失敗 {page_id[:8]}...: {e}")
+        except Exception as e:
+            logger.error(f"Notion 頁面建立失敗，捨棄 {page!r} 的待送更新: {e}")
+        finally:
+            self._pages.pop(page, None)
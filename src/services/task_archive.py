@@ -0,0 +1,161 @@
+import fnmatch
+import os
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.constants import TASK_ARCHIVE_CHUNK_SIZE
+
+# 支援的壓縮格式 → (media type, 副檔名)
+ARCHIVE_FORMATS = {
+    "zip": ("application/zip", ".zip"),
+    "tar.gz": ("application/gzip", ".tar.gz"),
+}
+
+# zip 單一檔案超過此大小時需要 ZIP64 欄位
+ZIP64_THRESHOLD = 0xFFFFFFFF
+
+
+class _ChunkSink:
+    """
+    只支援 write() 的輸出目標：zipfile 寫入的資料暫存在這裡，由產生器取出後 yield。
+    沒有 tell()/seek()，zipfile 會以串流模式寫入（使用 data descriptor）。
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _matches(path: str, patterns: list[str]) -> bool:
+    """glob 比對相對路徑；沒有 / 的 pattern 也比對檔名（例如 *.html）"""
+    name = path.rsplit("/", 1)[-1]
+    return any(
+        fnmatch.fnmatchcase(path, pattern) or ("/" not in pattern and fnmatch.fnmatchcase(name, pattern))
+        for pattern in patterns
+    )
+
+
+def iter_folder_files(
+    folder: Path,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+    include_hidden: bool = False
+) -> Iterator[tuple[Path, str]]:
+    """
+    依序列出資料夾內要打包的檔案 (絕對路徑, 相對路徑)。
+    不跟隨 symlink；被 exclude 的目錄整個略過，不會往下走訪。
+    預設略過以 . 開頭的檔案與目錄（.env、.git 等可能含有憑證）。
+    """
+    exclude = exclude or []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        relative_dir = Path(dirpath).relative_to(folder).as_posix()
+        prefix = "" if relative_dir == "." else f"{relative_dir}/"
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if (include_hidden or not d.startswith(".")) and not _matches(f"{prefix}{d}", exclude)
+        )
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            arcname = f"{prefix}{filename}"
+            if not include_hidden and filename.startswith("."):
+                continue
+            if path.is_symlink() or _matches(arcname, exclude):
+                continue
+            if include and not _matches(arcname, include):
+                continue
+            yield path, arcname
+
+
+def stream_archive(
+    folder: Path,
+    fmt: str,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+    include_hidden: bool = False
+) -> Iterator[bytes]:
+    """
+    邊讀檔邊產生壓縮檔內容（同步產生器，由 StreamingResponse 在 threadpool 中迭代）。
+    不建立暫存檔；記憶體用量只有一個讀取區塊加上壓縮器的緩衝。
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+
+    files = iter_folder_files(folder, include, exclude, include_hidden)
+    if fmt == "zip":
+        yield from _stream_zip(files, folder.name)
+    else:
+        yield from _stream_tar(files, folder.name)
+
+
+def _stream_zip(files: Iterator[tuple[Path, str]], root: str) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, arcname in files:
+            info = zipfile.ZipInfo.from_file(path, f"{root}/{arcname}")
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, "rb") as src, archive.open(
+                info, "w", force_zip64=info.file_size > ZIP64_THRESHOLD
+            ) as dst:
+                while chunk := src.read(TASK_ARCHIVE_CHUNK_SIZE):
+                    dst.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    # 中央目錄在 close 時寫出
+    if data := sink.drain():
+        yield data
+
+
+def _stream_tar(files: Iterator[tuple[Path, str]], root: str) -> Iterator[bytes]:
+    """
+    直接產生 tar 串流（PAX 格式）再交給壓縮器。tarfile.addfile 會一次讀完整個成員，
+    這裡自行寫入 header、分段內容與 512 bytes 對齊，讓大檔案也能邊讀邊送。
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31：gzip 格式
+    written = 0
+
+    def emit(data: bytes) -> bytes:
+        nonlocal written
+        written += len(data)
+        return compressor.compress(data)
+
+    for path, arcname in files:
+        info = tarfile.TarInfo(f"{root}/{arcname}")
+        stat = path.stat()
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        info.mode = stat.st_mode & 0o777
+        if data := emit(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")):
+            yield data
+
+        remaining = info.size
+        with open(path, "rb") as src:
+            while remaining > 0 and (chunk := src.read(min(TASK_ARCHIVE_CHUNK_SIZE, remaining))):
+                remaining -= len(chunk)
+                if data := emit(chunk):
+                    yield data
+        # 檔案在讀取期間變短時補零，維持 header 宣告的大小
+        padding = remaining + (-info.size % tarfile.BLOCKSIZE)
+        if padding and (data := emit(tarfile.NUL * padding)):
+            yield data
+
+    # 結尾兩個空 block，並補齊到 record 大小（與 tarfile 相同）
+    end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+    end += tarfile.NUL * (-(written + len(end)) % tarfile.RECORDSIZE)
+    yield emit(end) + compressor.flush()
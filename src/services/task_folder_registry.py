@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+
+from src.constants import TASK_TITLE_MAX_LENGTH
+from src.database.models import TaskFolder, TaskStatus
+from src.database.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def folder_base_name(title: str, date: Optional[datetime] = None) -> str:
+    """任務資料夾名稱（不含重複編號）：<日期>_<安全化標題>"""
+    date_str = (date or datetime.now()).strftime("%Y-%m-%d")
+    safe_title = "".join(c if c.isalnum() or c in "-_" else "_" for c in title)[:TASK_TITLE_MAX_LENGTH]
+    return f"{date_str}_{safe_title}"
+
+
+def split_folder_name(folder_name: str) -> tuple[str, int]:
+    """拆出重複編號：2025-01-01_cafe_2 → ("2025-01-01_cafe", 2)"""
+    base_name, _, suffix = folder_name.rpartition("_")
+    if base_name and suffix.isdigit() and "_" in base_name:
+        return base_name, int(suffix)
+    return folder_name, 0
+
+
+def folder_usage(folder: Path) -> tuple[int, int]:
+    """資料夾的 (總大小 bytes, 檔案數)，不跟隨 symlink"""
+    size = count = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, filename)).st_size
+                count += 1
+            except OSError:
+                pass
+    return size, count
+
+
+class TaskFolderRegistry:
+    """
+    任務資料夾登記表（task_folders 資料表）
+
+    reserve() 從資料庫取得同名資料夾的下一個編號，再以 mkdir 原子建立；
+    mkdir 失敗（其他程序或同時執行的任務先建立）就換下一個編號，因此不需逐一 exists()
+    探測，也不會有兩個任務拿到同一個資料夾。資料夾的狀態、大小與時間記錄在資料庫中，
+    列出或搜尋過去的任務不需走訪目錄。資料庫無法使用時仍會建立資料夾，只是不登記。
+    """
+
+    def __init__(self, tasks_dir: Path):
+        self.tasks_dir = tasks_dir
+
+    # ==================== 建立 ====================
+
+    async def reserve(self, title: str, prompt: str = "") -> Path:
+        """建立並登記新的任務資料夾"""
+        base_name = folder_base_name(title)
+        registered = True
+        try:
+            suffix = await self._next_suffix(base_name)
+        except Exception as e:
+            logger.warning(f"Task folder registry unavailable, creating folder without it: {e}")
+            suffix, registered = 0, False
+
+        while True:
+            folder_name = base_name if suffix == 0 else f"{base_name}_{suffix}"
+            task_folder = self.tasks_dir / folder_name
+            try:
+                # mkdir 是原子操作：資料夾已存在時拋出 FileExistsError
+                await asyncio.to_thread(task_folder.mkdir, parents=True)
+                break
+            except FileExistsError:
+                suffix += 1
+
+        if registered:
+            await self._register(TaskFolder(
+                folder_name=folder_name,
+                base_name=base_name,
+                suffix=suffix,
+                title=title,
+                prompt_hash=hashlib.sha256(prompt.encode("utf-8")).hexdigest() if prompt else None,
+                status=TaskStatus.RUNNING
+            ))
+        return task_folder
+
+    async def _next_suffix(self, base_name: str) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(func.max(TaskFolder.suffix)).where(TaskFolder.base_name == base_name)
+            )
+            highest = result.scalar()
+        return 0 if highest is None else highest + 1
+
+    async def _register(self, row: TaskFolder) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                # 資料夾剛由 mkdir 建立，同名的舊紀錄必定已失效（資料夾被手動刪除）
+                await db.execute(delete(TaskFolder).where(TaskFolder.folder_name == row.folder_name))
+                db.add(row)
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to register task folder {row.folder_name}: {e}")
+
+    # ==================== 更新 ====================
+
+    async def complete(self, task_folder: Path, status: TaskStatus, return_code: Optional[int] = None) -> None:
+        """任務結束時記錄狀態、大小與檔案數（只計算這一個資料夾）"""
+        try:
+            size, count = await asyncio.to_thread(folder_usage, task_folder)
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(TaskFolder)
+                    .where(TaskFolder.folder_name == task_folder.name)
+                    .values(
+                        status=status,
+                        return_code=return_code,
+                        size_bytes=size,
+                        file_count=count,
+                        completed_at=datetime.utcnow(),
+                        updated_at=datetime.utcnow()
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to update task folder {task_folder.name}: {e}")
+
+    # ==================== 既有資料夾 ====================
+
+    async def sync_existing(self) -> int:
+        """
+        登記 tasks/ 中尚未記錄的資料夾（登記表建立前的任務，或手動複製進來的）。
+        只列出第一層；只有新登記的資料夾會計算大小。回傳新登記的數量。
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(TaskFolder.folder_name))
+            known = set(result.scalars())
+
+        entries = await asyncio.to_thread(
+            lambda: [entry for entry in self.tasks_dir.iterdir() if entry.is_dir() and entry.name not in known]
+        )
+        if not entries:
+            return 0
+
+        rows = await asyncio.to_thread(lambda: [self._existing_row(entry) for entry in entries])
+        async with AsyncSessionLocal() as db:
+            db.add_all(rows)
+            await db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _existing_row(task_folder: Path) -> TaskFolder:
+        base_name, suffix = split_folder_name(task_folder.name)
+        size, count = folder_usage(task_folder)
+        modified_at = datetime.utcfromtimestamp(task_folder.stat().st_mtime)
+        return TaskFolder(
+            folder_name=task_folder.name,
+            base_name=base_name,
+            suffix=suffix,
+            size_bytes=size,
+            file_count=count,
+            created_at=modified_at,
+            updated_at=modified_at
+        )
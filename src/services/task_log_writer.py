@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from src.constants import TASK_LOG_BATCH_SIZE, TASK_LOG_FLUSH_INTERVAL_SECONDS
+from src.database.models import TaskLog
+from src.services.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+
+class TaskLogWriter:
+    """
+    TaskLog 批次寫入器
+
+    累積日誌後一次 commit，達到筆數上限或經過 flush_interval 秒時寫入，
+    狀態切換前由呼叫端強制 flush，確保日誌先於狀態事件送出。
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = TASK_LOG_BATCH_SIZE,
+        flush_interval: float = TASK_LOG_FLUSH_INTERVAL_SECONDS
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: list[TaskLog] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def pending(self) -> int:
+        """尚未寫入資料庫的日誌筆數"""
+        return len(self._buffer)
+
+    def add(self, project_id: int, message: str, log_type: str = "info") -> None:
+        """加入一筆日誌，必要時觸發寫入"""
+        self._buffer.append(TaskLog(
+            project_id=project_id,
+            message=message,
+            log_type=log_type
+        ))
+
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """排程定時寫入；沒有事件循環時（例如同步腳本）只依筆數觸發"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timer = loop.call_later(self.flush_interval, self._timed_flush)
+
+    def _timed_flush(self) -> None:
+        self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"定時寫入 TaskLog 失敗: {e}")
+
+    def flush(self) -> None:
+        """將緩衝的日誌一次寫入資料庫，並發布對應的 SSE 事件"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._buffer:
+            return
+
+        rows, self._buffer = self._buffer, []
+        try:
+            self.db.add_all(rows)
+            self.db.flush()
+            events = [
+                {
+                    "type": "log",
+                    "log_id": row.id,
+                    "message": row.message,
+                    "log_type": row.log_type,
+                    "timestamp": row.created_at.isoformat()
+                }
+                for row in rows
+            ]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            # 放回緩衝區最前面（rollback 後原物件已脫離 session，改用新的物件），下次 flush 再寫入
+            self._buffer[:0] = [
+                TaskLog(
+                    project_id=row.project_id,
+                    message=row.message,
+                    log_type=row.log_type,
+                    created_at=row.created_at
+                )
+                for row in rows
+            ]
+            if self._timer is None:
+                self._schedule_flush()
+            logger.error(f"寫入 {len(rows)} 筆 TaskLog 失敗，保留於緩衝區")
+            raise
+
+        for row, event in zip(rows, events):
+            event_bus.publish(row.project_id, event)
+
+    def close(self) -> None:
+        """寫入剩餘日誌（任務結束時呼叫）；失敗時不再排程重試"""
+        try:
+            self.flush()
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
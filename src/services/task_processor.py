@@ -1,12 +1,17 @@
+import asyncio
 import logging
 import re
 from typing import Optional
 
 from src.services.notion_service import notion_service
+from src.services.notion_write_behind import PendingPage
 from src.services.claude_service import claude_service
 from src.services.claude_code_service import claude_code_service
 from src.services.line_service import line_service
+from src.services.task_scheduler import task_scheduler
 from src.models.claude_response import ClaudeResponse
+from src.config import settings
+from src.constants import TASK_PRIORITY_ADMIN, TASK_PRIORITY_USER
 
 logger = logging.getLogger(__name__)
 
@@ -86,7 +91,8 @@ class TaskProcessor:
         self,
         user_input: str,
         source: str = "line",
-        reply_token: Optional[str] = None
+        reply_token: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> None:
         """
         Main task processing flow:
@@ -94,31 +100,36 @@ class TaskProcessor:
         2. Read Memory
         3. Stage 1: Claude API analyzes task
         4. Create Review task (with status)
-        5. Stage 2: If complex, execute with Claude Code
+        5. Stage 2: If complex, execute with Claude Code (via task_scheduler)
         6. Update Memory (if needed)
         7. Delete Inbox task
         8. Push notification to Joey
+
+        Notion 的建立與狀態更新以 write-behind 方式在背景送出，
+        不阻塞 Claude 呼叫與 LINE 通知；流程結束前才等待它們完成。
         """
-        inbox_task_id = None
-        review_task_id = None
+        inbox_task = None
+        review_task = None
 
         try:
-            # Step 1: Create Inbox task
+            # Step 1: Create Inbox task (in background)
             logger.info("Creating inbox task...")
             title = user_input[:50] + "..." if len(user_input) > 50 else user_input
-            inbox_task_id = await notion_service.create_inbox_task(
-                title=title,
-                raw_input=user_input,
-                source=source
+            inbox_task = notion_service.defer_create(
+                notion_service.create_inbox_task(
+                    title=title,
+                    raw_input=user_input,
+                    source=source
+                ),
+                name=title
             )
-            logger.info(f"Inbox task created: {inbox_task_id}")
 
             # Update status to processing
-            await notion_service.update_inbox_status(inbox_task_id, "processing")
+            notion_service.defer_inbox_status(inbox_task, "processing")
 
             # Step 2: Read Memory
             logger.info("Reading memories...")
-            memories = await notion_service.format_memories_for_prompt()
+            memories, relevant_memories = await notion_service.select_memories_for_prompt(user_input)
 
             # ============================================
             # Stage 1: Claude API Analysis (fast)
@@ -126,13 +137,17 @@ class TaskProcessor:
             logger.info("Stage 1: Calling Claude API for task analysis...")
             response = await claude_service.process_task(
                 user_input=user_input,
-                memories=memories
+                memories=memories,
+                relevant_memories=relevant_memories
             )
             logger.info(f"Claude response - difficulty: {response.difficulty}")
 
             # Step 4: Create Review task
             logger.info("Creating review task...")
-            review_task_id = await self._create_review_task(response, inbox_task_id)
+            review_task = notion_service.defer_create(
+                self._create_review_task(response, inbox_task),
+                name=response.title
+            )
 
             # Notify Joey that task is being processed
             if response.difficulty == "complex":
@@ -150,22 +165,38 @@ class TaskProcessor:
                 logger.info("Stage 2: Executing complex task with Claude Code...")
 
                 # Update review task status to executing
-                await notion_service.update_review_task_status(review_task_id, "executing")
+                notion_service.defer_review_status(review_task, "executing")
 
                 # Execute with Claude Code (Ralph Wiggum retry loop enabled)
                 # 長時間任務支援：每次迭代最多 6 小時，最多重試 10 次
                 # 理論上可以跑 60 小時（2.5 天）
-                execution_result = await claude_code_service.execute_task_with_retry(
-                    prompt=response.complex_result.prompt_for_claude_code,
-                    title=response.title,
-                    max_retries=10,  # 最多重試 10 次
-                    timeout_seconds=21600  # 每次最多 6 小時
+                # 透過排程器限制同時執行的 Claude Code 數量，管理員任務優先
+                owner = user_id or settings.joey_line_user_id
+                priority = TASK_PRIORITY_ADMIN if owner == settings.joey_line_user_id else TASK_PRIORITY_USER
+
+                async def notify_queued(position: int) -> None:
+                    await line_service.push_to_joey(
+                        f"⏳ 排隊中：{response.title}\n\n"
+                        f"目前排在第 {position} 位，輪到時會自動開始執行。"
+                    )
+
+                execution_result = await task_scheduler.run(
+                    lambda: claude_code_service.execute_task_with_retry(
+                        prompt=response.complex_result.prompt_for_claude_code,
+                        title=response.title,
+                        max_retries=10,  # 最多重試 10 次
+                        timeout_seconds=21600  # 每次最多 6 小時
+                    ),
+                    owner=owner,
+                    priority=priority,
+                    name=response.title,
+                    on_queued=notify_queued
                 )
 
                 # Update review task with result
                 if execution_result["success"]:
-                    await notion_service.update_review_task_result(
-                        page_id=review_task_id,
+                    notion_service.defer_review_result(
+                        review_task,
                         status="completed",
                         result=execution_result["output"][:2000],
                         folder_path=execution_result["folder_path"]
@@ -174,8 +205,14 @@ class TaskProcessor:
                     # Extract URLs from output
                     urls = extract_result_urls(execution_result["output"])
 
-                    # Build Notion URL
-                    notion_url = f"https://notion.so/{review_task_id.replace('-', '')}"
+                    # Build Notion URL (review page was created long before execution finished);
+                    # the task itself succeeded, so a failed page creation only drops the link
+                    try:
+                        review_task_id = await review_task.page_id()
+                        notion_url = f"https://notion.so/{review_task_id.replace('-', '')}"
+                    except Exception as e:
+                        logger.error(f"Review page creation failed, sending result without Notion link: {e}")
+                        notion_url = None
 
                     # Send simplified success notification
                     message_parts = [f"✅ {response.title}"]
@@ -183,12 +220,13 @@ class TaskProcessor:
                     if urls["deploy_url"]:
                         message_parts.append(f"\n🌐 {urls['deploy_url']}")
 
-                    message_parts.append(f"\n📋 {notion_url}")
+                    if notion_url:
+                        message_parts.append(f"\n📋 {notion_url}")
 
                     await line_service.push_to_joey("".join(message_parts))
                 else:
-                    await notion_service.update_review_task_result(
-                        page_id=review_task_id,
+                    notion_service.defer_review_result(
+                        review_task,
                         status="failed",
                         result=f"執行失敗：{execution_result['error']}"
                     )
@@ -209,7 +247,7 @@ class TaskProcessor:
 
             # Step 6: Delete Inbox task
             logger.info("Deleting inbox task...")
-            await notion_service.delete_inbox_task(inbox_task_id)
+            notion_service.defer_inbox_delete(inbox_task)
 
             logger.info("Task processing completed successfully")
 
@@ -224,31 +262,30 @@ class TaskProcessor:
                 logger.error(f"Failed to send error notification: {notify_error}")
 
             # Update review task status to failed if it exists
-            if review_task_id:
-                try:
-                    await notion_service.update_review_task_result(
-                        page_id=review_task_id,
-                        status="failed",
-                        result=f"錯誤：{str(e)[:500]}"
-                    )
-                except Exception:
-                    pass
+            if review_task:
+                notion_service.defer_review_result(
+                    review_task,
+                    status="failed",
+                    result=f"錯誤：{str(e)[:500]}"
+                )
 
             # Clean up inbox task if it was created
-            if inbox_task_id:
-                try:
-                    await notion_service.delete_inbox_task(inbox_task_id)
-                except Exception:
-                    pass
+            if inbox_task:
+                notion_service.defer_inbox_delete(inbox_task)
 
             raise
 
+        finally:
+            # 等待背景的 Notion 寫入完成（失敗只記錄）
+            await notion_service.flush_writes(inbox_task, review_task)
+
     async def _create_review_task(
         self,
         response: ClaudeResponse,
-        source_task_id: str
+        inbox_task: PendingPage
     ) -> str:
-        """Create appropriate review task based on difficulty."""
+        """Create appropriate review task based on difficulty (after the Inbox task exists)."""
+        source_task_id = await inbox_task.page_id()
 
         if response.difficulty == "simple" and response.simple_result:
             return await notion_service.create_review_task_simple(
@@ -278,41 +315,57 @@ class TaskProcessor:
             )
 
     async def _process_memory_updates(self, response: ClaudeResponse) -> None:
-        """Process memory updates from Claude response."""
-
+        """
+        Process memory updates from Claude response.
+        Titles resolve through the memory cache's title index, and writes for
+        different titles run concurrently (same-title updates stay in order).
+        """
+        by_title: dict[str, list] = {}
         for update in response.memory_updates:
-            try:
-                if update.action == "create":
+            by_title.setdefault(update.title, []).append(update)
+
+        # 一次載入記憶快取，之後的標題查詢都不需額外查詢 Notion
+        await notion_service.get_all_memories()
+
+        async def apply_in_order(updates: list) -> None:
+            for update in updates:
+                await self._apply_memory_update(update)
+
+        await asyncio.gather(*(apply_in_order(updates) for updates in by_title.values()))
+
+    async def _apply_memory_update(self, update) -> None:
+        try:
+            if update.action == "create":
+                await notion_service.create_memory(
+                    title=update.title,
+                    category=update.category or "context",
+                    content=update.content,
+                    importance=update.importance or "medium"
+                )
+                logger.info(f"Created memory: {update.title}")
+
+            elif update.action == "update":
+                # Find existing memory by title
+                existing = await notion_service.find_memory_by_title(update.title, refresh=False)
+                if existing:
+                    await notion_service.update_memory(
+                        page_id=existing["id"],
+                        content=update.content,
+                        importance=update.importance
+                    )
+                    logger.info(f"Updated memory: {update.title}")
+                else:
+                    # Create if not found
                     await notion_service.create_memory(
                         title=update.title,
                         category=update.category or "context",
                         content=update.content,
                         importance=update.importance or "medium"
                     )
-                    logger.info(f"Created memory: {update.title}")
-
-                elif update.action == "update":
-                    # Find existing memory by title
-                    existing = await notion_service.find_memory_by_title(update.title)
-                    if existing:
-                        await notion_service.update_memory(
-                            page_id=existing["id"],
-                            content=update.content,
-                            importance=update.importance
-                        )
-                        logger.info(f"Updated memory: {update.title}")
-                    else:
-                        # Create if not found
-                        await notion_service.create_memory(
-                            title=update.title,
-                            category=update.category or "context",
-                            content=update.content,
-                            importance=update.importance or "medium"
-                        )
-                        logger.info(f"Created memory (not found for update): {update.title}")
-
-            except Exception as e:
-                logger.error(f"Error processing memory update '{update.title}': {e}")
+                    logger.info(f"Created memory (not found for update): {update.title}")
+
+        except Exception as e:
+            logger.error(f"Error processing memory update '{update.title}': {e}")
 
 
 task_processor = TaskProcessor()
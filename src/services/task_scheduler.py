@@ -0,0 +1,192 @@
+import asyncio
+import bisect
+import inspect
+import itertools
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from src.config import settings
+from src.constants import TASK_PRIORITY_USER
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    """排程中的任務"""
+    id: int
+    owner: str
+    priority: int
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    key: Optional[str] = None
+    state: str = "queued"  # queued, running, done, cancelled
+    submitted_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    future: asyncio.Future = field(default=None, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (self.priority, self.id)
+
+
+class TaskScheduler:
+    """
+    Claude Code 執行排程器
+
+    限制同時執行的任務數（max_workers）與每位使用者的同時執行數
+    （per_user_limit），其餘任務依優先權（數字越小越優先）與提交順序排隊。
+    """
+
+    def __init__(self, max_workers: int, per_user_limit: int):
+        self.max_workers = max_workers
+        self.per_user_limit = per_user_limit
+        self._queue: list[ScheduledJob] = []
+        self._running: dict[int, ScheduledJob] = {}
+        self._running_per_owner: dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    # ==================== 提交與等待 ====================
+
+    def submit(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        owner: str,
+        priority: int = TASK_PRIORITY_USER,
+        name: str = "",
+        key: Optional[str] = None
+    ) -> ScheduledJob:
+        """提交任務，回傳 ScheduledJob（可 await job.future 取得結果）"""
+        job = ScheduledJob(
+            id=next(self._ids),
+            owner=owner,
+            priority=priority,
+            name=name,
+            func=func,
+            key=key,
+            future=asyncio.get_running_loop().create_future()
+        )
+        keys = [queued.sort_key for queued in self._queue]
+        self._queue.insert(bisect.bisect(keys, job.sort_key), job)
+        logger.info(f"Scheduled job #{job.id} '{name}' for {owner} (priority {priority})")
+
+        self._dispatch()
+        return job
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        owner: str,
+        priority: int = TASK_PRIORITY_USER,
+        name: str = "",
+        key: Optional[str] = None,
+        on_queued: Optional[Callable[[int], Any]] = None
+    ) -> Any:
+        """
+        提交任務並等待結果。
+        若任務需要排隊，會以排隊位置（從 1 開始）呼叫 on_queued。
+        """
+        job = self.submit(func, owner=owner, priority=priority, name=name, key=key)
+
+        position = self.position(job)
+        if position and on_queued:
+            try:
+                result = on_queued(position)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Queue notification failed for job #{job.id}: {e}")
+
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            self.cancel(job)
+            raise
+
+    def cancel(self, job: ScheduledJob) -> None:
+        """取消排隊中或執行中的任務"""
+        if job.state == "queued":
+            self._queue.remove(job)
+            job.state = "cancelled"
+            if not job.future.done():
+                job.future.cancel()
+        elif job.state == "running" and job.task:
+            job.task.cancel()
+
+    # ==================== 狀態查詢 ====================
+
+    def position(self, job: ScheduledJob) -> Optional[int]:
+        """排隊位置（從 1 開始）；已開始執行或結束時回傳 None"""
+        if job.state != "queued":
+            return None
+        return self._queue.index(job) + 1
+
+    def find(self, key: str) -> Optional[ScheduledJob]:
+        """依 key 找出排隊中或執行中的任務"""
+        for job in itertools.chain(self._running.values(), self._queue):
+            if job.key == key:
+                return job
+        return None
+
+    def stats(self) -> dict:
+        """排程器目前狀態"""
+        return {
+            "max_workers": self.max_workers,
+            "per_user_limit": self.per_user_limit,
+            "running": len(self._running),
+            "queued": len(self._queue),
+        }
+
+    # ==================== 內部調度 ====================
+
+    def _dispatch(self) -> None:
+        """在有空閒 worker 時，依優先順序啟動第一個未超過使用者上限的任務"""
+        while len(self._running) < self.max_workers:
+            job = next(
+                (
+                    queued for queued in self._queue
+                    if self._running_per_owner.get(queued.owner, 0) < self.per_user_limit
+                ),
+                None
+            )
+            if job is None:
+                return
+
+            self._queue.remove(job)
+            job.state = "running"
+            job.started_at = datetime.utcnow()
+            self._running[job.id] = job
+            self._running_per_owner[job.owner] = self._running_per_owner.get(job.owner, 0) + 1
+            job.task = asyncio.create_task(self._execute(job))
+            logger.info(f"Started job #{job.id} '{job.name}' ({len(self._running)}/{self.max_workers} workers busy)")
+
+    async def _execute(self, job: ScheduledJob) -> None:
+        try:
+            result = await job.func()
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+        except Exception as e:
+            logger.error(f"Job #{job.id} '{job.name}' failed: {e}")
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            job.state = "done"
+            self._running.pop(job.id, None)
+            remaining = self._running_per_owner.get(job.owner, 1) - 1
+            if remaining > 0:
+                self._running_per_owner[job.owner] = remaining
+            else:
+                self._running_per_owner.pop(job.owner, None)
+            self._dispatch()
+
+
+task_scheduler = TaskScheduler(
+    max_workers=settings.task_max_concurrency,
+    per_user_limit=settings.task_per_user_concurrency
+)
@@ -0,0 +1,234 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+from src.constants import UPLOAD_CHUNK_SIZE, UPLOAD_HASH_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """上傳內容超過大小限制"""
+
+
+class UploadBudgetExceededError(UploadTooLargeError):
+    """同一請求的上傳總量超過限制"""
+
+
+class ByteBudget:
+    """多個檔案共用的位元組額度（同一請求並行上傳時使用）"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    def consume(self, size: int) -> None:
+        if self.used + size > self.limit:
+            raise UploadBudgetExceededError(f"request exceeds {self.limit} bytes")
+        self.used += size
+
+    def release(self, size: int) -> None:
+        self.used -= size
+
+
+@dataclass
+class StoredUpload:
+    """已儲存的上傳檔案"""
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+    deduplicated: bool
+
+
+class UploadStore:
+    """
+    Content-addressed 上傳檔案儲存
+
+    檔案內容以 SHA-256 存於 <root>/.objects/ab/abcd...，對外的檔名
+    <root>/<filename> 是指向該內容的 hard link，因此相同內容只佔一份空間。
+    上傳以串流方式寫入暫存檔，邊寫邊計算雜湊並檢查大小；磁碟操作都在 thread 中執行。
+    以 . 開頭的名稱保留給內部目錄（.objects、.tmp），不能作為上傳檔名。
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.objects_dir = root / ".objects"
+        self.tmp_dir = root / ".tmp"
+        for directory in (self.root, self.objects_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        # (inode, mtime_ns, size) → sha256（LRU）；物件內容不會被原地修改，可安全快取
+        self._hash_cache: OrderedDict[tuple[int, int, int], str] = OrderedDict()
+
+    def path_for(self, filename: str) -> Path:
+        """
+        對外檔名的路徑（去除路徑部分，避免寫到 root 之外）。
+        空白或以 . 開頭的名稱（內部目錄）拋出 ValueError。
+        """
+        name = Path(filename).name
+        if not name or name.startswith("."):
+            raise ValueError(f"Invalid upload filename: {filename!r}")
+        return self.root / name
+
+    def find(self, filename: str) -> Optional[Path]:
+        """已上傳檔案的路徑；名稱無效、不存在或不是一般檔案時回傳 None"""
+        try:
+            path = self.path_for(filename)
+        except ValueError:
+            return None
+        return path if path.is_file() else None
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    # ==================== 寫入 ====================
+
+    async def save(
+        self,
+        file: UploadFile,
+        max_size: int,
+        filename: Optional[str] = None,
+        budget: Optional[ByteBudget] = None
+    ) -> StoredUpload:
+        """
+        串流寫入上傳檔案；超過 max_size（或共用的 budget）時拋出 UploadTooLargeError，
+        不留下任何檔案，已使用的 budget 也會歸還。
+        """
+        filename = self.path_for(filename or file.filename).name
+        tmp = await asyncio.to_thread(
+            tempfile.NamedTemporaryFile, dir=self.tmp_dir, delete=False
+        )
+        digest = hashlib.sha256()
+        size = consumed = 0
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"{filename} exceeds {max_size} bytes")
+                if budget is not None:
+                    budget.consume(len(chunk))
+                    consumed += len(chunk)
+                digest.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+            await asyncio.to_thread(tmp.close)
+        except BaseException:
+            if budget is not None:
+                budget.release(consumed)
+            await asyncio.to_thread(self._discard, tmp)
+            raise
+
+        sha256 = digest.hexdigest()
+        deduplicated = await asyncio.to_thread(self._commit, Path(tmp.name), sha256, filename)
+        return StoredUpload(
+            filename=filename,
+            path=self.path_for(filename),
+            size=size,
+            sha256=sha256,
+            deduplicated=deduplicated
+        )
+
+    @staticmethod
+    def _discard(tmp: BinaryIO) -> None:
+        tmp.close()
+        Path(tmp.name).unlink(missing_ok=True)
+
+    def _commit(self, tmp_path: Path, sha256: str, filename: str) -> bool:
+        """把暫存檔移入物件區並建立檔名連結；內容已存在時回傳 True"""
+        object_path = self.object_path(sha256)
+        object_path.parent.mkdir(exist_ok=True)
+        deduplicated = object_path.exists()
+        if deduplicated:
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, object_path)
+
+        target = self.path_for(filename)
+        if target.exists():
+            if os.path.samefile(target, object_path):
+                return deduplicated
+            self._unlink_name(target)
+
+        try:
+            os.link(object_path, target)
+        except OSError:
+            # 檔案系統不支援 hard link 時退回複製；物件若沒有其他檔名連結就不保留
+            shutil.copyfile(object_path, target)
+            if object_path.stat().st_nlink == 1:
+                object_path.unlink()
+        return deduplicated
+
+    # ==================== 讀取 ====================
+
+    async def content_hash(self, path: Path) -> str:
+        """檔案內容的 SHA-256（用於 ETag），依 inode/mtime/size 快取"""
+        stat = path.stat()
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        sha256 = self._hash_cache.get(key)
+        if sha256 is None:
+            sha256 = await asyncio.to_thread(self._hash_file, path)
+            self._hash_cache[key] = sha256
+            if len(self._hash_cache) > UPLOAD_HASH_CACHE_SIZE:
+                self._hash_cache.popitem(last=False)
+        else:
+            self._hash_cache.move_to_end(key)
+        return sha256
+
+    async def compressed_variant(self, path: Path, sha256: str, encoding: str) -> Path:
+        """
+        取得壓縮後的版本（gzip 或 br），第一次請求時壓縮並存在物件旁，之後直接重用。
+        """
+        variant = self.object_path(sha256).with_name(f"{sha256}.{encoding}")
+        if not variant.exists():
+            await asyncio.to_thread(self._write_compressed, path, variant, encoding)
+        return variant
+
+    def _write_compressed(self, path: Path, variant: Path, encoding: str) -> None:
+        data = path.read_bytes()
+        if encoding == "br":
+            import brotli
+            compressed = brotli.compress(data, mode=brotli.MODE_TEXT)
+        else:
+            compressed = gzip.compress(data, compresslevel=6, mtime=0)
+
+        variant.parent.mkdir(exist_ok=True)
+        tmp_path = variant.with_name(f"{variant.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(compressed)
+        os.replace(tmp_path, variant)
+
+    # ==================== 刪除 ====================
+
+    async def delete(self, filename: str) -> None:
+        await asyncio.to_thread(self._unlink_name, self.path_for(filename))
+
+    def _unlink_name(self, path: Path) -> None:
+        """
+        刪除檔名；若物件已沒有其他檔名連結（包含退回複製時留下的物件），
+        一併刪除物件與壓縮版本。
+        """
+        sha256 = self._hash_file(path)
+        object_path = self.object_path(sha256)
+        path.unlink()
+        if object_path.exists():
+            if object_path.stat().st_nlink > 1:
+                return
+            object_path.unlink()
+        for variant in object_path.parent.glob(f"{sha256}.*"):
+            variant.unlink(missing_ok=True)
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
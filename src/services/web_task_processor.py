@@ -1,9 +1,17 @@
 import logging
 import asyncio
 from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import Session
-from src.database.models import Project, TaskLog, TaskStatus
+from sqlalchemy import select
+from src.database.session import SessionLocal, AsyncSessionLocal
+from src.database.models import JobStatus, Project, TaskStatus
 from src.services.claude_service import ClaudeService
+from src.services.event_bus import event_bus
+from src.services.task_log_writer import TaskLogWriter
+from src.services.task_scheduler import task_scheduler
+from src.services.job_queue import job_queue
+from src.constants import TASK_PRIORITY_USER
 
 logger = logging.getLogger(__name__)
 
@@ -11,37 +19,87 @@ logger = logging.getLogger(__name__)
 class WebTaskProcessor:
     """處理 Web 專案任務的執行器"""
 
-    def __init__(self, db: Session):
-        self.db = db
+    def __init__(self, db: Optional[Session] = None):
+        # 背景任務在請求結束後才執行，預設自行建立 session 而非沿用請求的 session
+        self._owns_session = db is None
+        self.db = db or SessionLocal()
         self.claude_service = ClaudeService()
+        self.log_writer = TaskLogWriter(self.db)
 
     def _log(self, project_id: int, message: str, log_type: str = "info"):
-        """新增任務日誌"""
-        log = TaskLog(
-            project_id=project_id,
-            message=message,
-            log_type=log_type
-        )
-        self.db.add(log)
-        self.db.commit()
+        """新增任務日誌（批次寫入）"""
+        self.log_writer.add(project_id, message, log_type)
         logger.info(f"[Project {project_id}] {message}")
 
     def _update_project_status(self, project_id: int, status: TaskStatus, **kwargs):
-        """更新專案狀態"""
+        """更新專案狀態（先寫入緩衝中的日誌）"""
+        self.log_writer.flush()
         project = self.db.query(Project).filter(Project.id == project_id).first()
         if project:
             project.status = status
             for key, value in kwargs.items():
                 setattr(project, key, value)
             self.db.commit()
+            event_bus.publish(project_id, {
+                "type": "status",
+                "status": project.status.value,
+                "updated_at": project.updated_at.isoformat(),
+                "result_summary": project.result_summary,
+                "error_message": project.error_message
+            })
+
+    @staticmethod
+    def scheduler_key(project_id: int) -> str:
+        """專案在 task_scheduler 中的 key"""
+        return f"project:{project_id}"
+
+    async def _execute(self, project_id: int, project_name: str):
+        """排程器分配到 worker 後實際執行任務"""
+        # Mark as running
+        self._update_project_status(
+            project_id,
+            TaskStatus.RUNNING,
+            started_at=datetime.utcnow(),
+            # 重試時清除上一次失敗留下的結果
+            completed_at=None,
+            error_message=None
+        )
+        self._log(project_id, f"開始執行任務: {project_name}", "info")
+
+        # Process with Claude
+        self._log(project_id, "正在呼叫 Claude API...", "info")
+
+        # TODO: 實際整合 Claude Code Service
+        # For now, simulate processing
+        await asyncio.sleep(2)
+        self._log(project_id, "正在分析需求...", "tool_use")
+
+        await asyncio.sleep(3)
+        self._log(project_id, "正在生成程式碼...", "tool_use")
+
+        await asyncio.sleep(2)
+        self._log(project_id, "正在執行測試...", "tool_use")
+
+        # Simulate completion
+        result_summary = f"成功完成任務: {project_name}\n\n執行結果已儲存。"
+
+        # 先寫入日誌再切換狀態，訂閱者收到終止狀態時已拿到所有日誌
+        self._log(project_id, "任務執行完成", "success")
+        self._update_project_status(
+            project_id,
+            TaskStatus.COMPLETED,
+            completed_at=datetime.utcnow(),
+            result_summary=result_summary
+        )
 
     async def process_task(self, project_id: int):
         """
         執行專案任務
-        1. 標記為 RUNNING
-        2. 呼叫 Claude API 執行任務
-        3. 收集結果
-        4. 標記為 COMPLETED/FAILED
+        1. 提交至 task_scheduler 排隊（狀態維持 PENDING）
+        2. 標記為 RUNNING
+        3. 呼叫 Claude API 執行任務
+        4. 收集結果
+        5. 標記為 COMPLETED/FAILED
         """
         try:
             # Load project
@@ -50,45 +108,86 @@ class WebTaskProcessor:
                 logger.error(f"Project {project_id} not found")
                 return
 
-            # Mark as running
-            self._update_project_status(
-                project_id,
-                TaskStatus.RUNNING,
-                started_at=datetime.utcnow()
+            await task_scheduler.run(
+                lambda: self._execute(project_id, project.name),
+                owner=f"web:{project.owner_id}",
+                priority=TASK_PRIORITY_USER,
+                name=project.name,
+                key=self.scheduler_key(project_id),
+                on_queued=lambda position: self._log(
+                    project_id, f"排隊中，目前排在第 {position} 位", "info"
+                )
             )
-            self._log(project_id, f"開始執行任務: {project.name}", "info")
 
-            # Process with Claude
-            self._log(project_id, "正在呼叫 Claude API...", "info")
+        except Exception as e:
+            logger.error(f"Task processing failed for project {project_id}: {str(e)}")
+            try:
+                self._log(project_id, f"任務執行失敗: {str(e)}", "error")
+                self._update_project_status(
+                    project_id,
+                    TaskStatus.FAILED,
+                    completed_at=datetime.utcnow(),
+                    error_message=str(e)
+                )
+            except Exception as status_error:
+                logger.error(f"Failed to mark project {project_id} as failed: {status_error}")
+            # 交由 job_queue 依 max_attempts 重試
+            raise
 
-            # TODO: 實際整合 Claude Code Service
-            # For now, simulate processing
-            await asyncio.sleep(2)
-            self._log(project_id, "正在分析需求...", "tool_use")
+        finally:
+            try:
+                self.log_writer.close()
+            except Exception as e:
+                logger.error(f"Failed to write remaining logs for project {project_id}: {e}")
+            if self._owns_session:
+                self.db.close()
 
-            await asyncio.sleep(3)
-            self._log(project_id, "正在生成程式碼...", "tool_use")
 
-            await asyncio.sleep(2)
-            self._log(project_id, "正在執行測試...", "tool_use")
+WEB_PROJECT_JOB = "web_project"
 
-            # Simulate completion
-            result_summary = f"成功完成任務: {project.name}\n\n執行結果已儲存。"
 
-            self._update_project_status(
-                project_id,
-                TaskStatus.COMPLETED,
-                completed_at=datetime.utcnow(),
-                result_summary=result_summary
-            )
-            self._log(project_id, "任務執行完成", "success")
+async def enqueue_project(project_id: int, owner_id: int) -> int:
+    """將專案任務寫入持久化佇列，回傳 job id"""
+    return await job_queue.enqueue(
+        WEB_PROJECT_JOB,
+        {"project_id": project_id},
+        owner=f"web:{owner_id}",
+        priority=TASK_PRIORITY_USER
+    )
 
-        except Exception as e:
-            logger.error(f"Task processing failed for project {project_id}: {str(e)}")
-            self._update_project_status(
-                project_id,
-                TaskStatus.FAILED,
-                completed_at=datetime.utcnow(),
-                error_message=str(e)
-            )
-            self._log(project_id, f"任務執行失敗: {str(e)}", "error")
+
+async def project_job_position(project_id: int) -> Optional[tuple[JobStatus, Optional[int]]]:
+    """專案在持久化佇列中的 (狀態, 排隊位置)；沒有未結束的任務時回傳 None"""
+    return await job_queue.position(WEB_PROJECT_JOB, {"project_id": project_id})
+
+
+async def resume_interrupted_projects() -> int:
+    """
+    重新排入仍為 PENDING/RUNNING 但佇列中沒有對應任務的專案
+    （例如在持久化佇列上線前建立的專案），於 lifespan 呼叫。
+    """
+    queued_ids = {
+        payload.get("project_id")
+        for payload in await job_queue.pending_payloads(WEB_PROJECT_JOB)
+    }
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Project.id, Project.owner_id)
+            .where(Project.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING]))
+        )
+        projects = result.all()
+
+    resumed = 0
+    for project_id, owner_id in projects:
+        if project_id not in queued_ids:
+            await enqueue_project(project_id, owner_id)
+            resumed += 1
+    return resumed
+
+
+async def _run_project_job(payload: dict) -> None:
+    await WebTaskProcessor().process_task(payload["project_id"])
+
+
+job_queue.register(WEB_PROJECT_JOB, _run_project_job)